@@ -0,0 +1,236 @@
+"""
+Analyse d'un lot de positions (verification des coups joues, parties perdues),
+une recherche a budget fixe par position, sur tous les coeurs.
+
+    python analyze.py games.rec --depth 8 -o analyse.jsonl
+    python analyze.py positions.jsonl --nodes 50000 --check-played -o analyse.jsonl
+    python analyze.py games.rec --depth 8 -o analyse.jsonl --resume   (apres un arret)
+
+Entree : un fichier de parties (records.py, le coup joue y est connu) ou un
+fichier texte avec une position JSON par ligne :
+    {"board": [48 entiers, board[3 * trou + couleur]] ou [[r, b, t] x 16],
+     "scores": [s1, s2], "player": 0, "ply": 57, "move": "3R", "id": "partie 12"}
+("move" : coup joue, facultatif ; "ply" et "id" aussi).
+
+Sortie : une ligne JSON par position, dans l'ordre de l'entree quel que soit
+l'ordre de fin des processus : meilleur coup, score vu par le joueur au trait,
+profondeur, variation principale, noeuds, tous de la derniere iteration terminee
+("partial" : coup d'une iteration interrompue, avec sa profondeur et une borne
+de son score). Avec --check-played, le coup joue est aussi cherche seul, a la
+profondeur atteinte pour le meilleur coup, et "loss" donne ce qu'il coute par
+rapport au meilleur. Chaque position a son propre bot : a budget en profondeur
+ou en noeuds, le resultat ne depend ni du nombre de processus ni d'une reprise.
+
+Reprise : les lignes sont ecrites (et videes) au fur et a mesure ; --resume
+garde les lignes completes du fichier de sortie et reprend a la suivante.
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from bot import MinimaxBot
+from game import encode_move, move_name
+from time_manager import TimeManager
+import records
+import weights
+
+_config = {}
+
+
+def _init_worker(config):
+    global _config
+    _config = config
+
+
+def parse_line(line, number):
+    """Position d'une ligne JSON -> (board, scores, player, ply, coup joue, id) ; ValueError si invalide."""
+    try:
+        data = json.loads(line)
+    except ValueError:
+        raise ValueError(f"ligne {number} : JSON illisible") from None
+    if not isinstance(data, dict) or not isinstance(data.get("board"), list):
+        raise ValueError(f"ligne {number} : position sans board")
+    board = data["board"]
+    if len(board) == 16 and all(isinstance(hole, list) and len(hole) == 3 for hole in board):
+        board = [count for hole in board for count in hole]
+    if len(board) != 48 or any(not isinstance(count, int) or count < 0 for count in board):
+        raise ValueError(f"ligne {number} : board doit avoir 48 valeurs (ou 16 trous de 3)")
+    scores = data.get("scores")
+    if (not isinstance(scores, list) or len(scores) != 2
+            or any(not isinstance(score, int) or score < 0 for score in scores)):
+        raise ValueError(f"ligne {number} : scores doit etre [s1, s2]")
+    if sum(board) + sum(scores) > 96:
+        raise ValueError(f"ligne {number} : plus de 96 graines entre le plateau et les scores")
+    player = data.get("player", 0)
+    if player not in (0, 1):
+        raise ValueError(f"ligne {number} : player doit etre 0 ou 1")
+    ply = data.get("ply", 0)
+    if not isinstance(ply, int) or ply < 0:
+        raise ValueError(f"ligne {number} : ply doit etre un entier positif")
+    played = data.get("move")
+    if played is not None:
+        if not isinstance(played, str):
+            raise ValueError(f"ligne {number} : coup illisible {played!r}")
+        digits = played.rstrip("RBT")
+        played = encode_move(int(digits) - 1, played[len(digits):]) if digits.isdigit() else None
+        if played is None:
+            raise ValueError(f"ligne {number} : coup illisible {data['move']}")
+    return board, tuple(scores), player, ply, played, data.get("id")
+
+
+def read_positions(path):
+    """(board, scores, player, ply, coup joue, id) pour chaque position du fichier."""
+    with open(path, "rb") as f:
+        magic = f.read(len(records.MAGIC))
+    if magic == records.MAGIC:
+        reader = records.RecordReader(path)
+        try:
+            for position in reader.positions():
+                yield bytes(position.board), position.scores, position.side, position.ply, position.move, None
+        finally:
+            reader.close()
+        return
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            if line.strip():
+                yield parse_line(line, number)
+
+
+def make_bot(player_id, config):
+    bot = MinimaxBot(player_id, tt_size_mb=config["tt"], weights=config["weights"],
+                     time_manager=TimeManager(move_time=config["time"] or float("inf"), safety_margin=0.0,
+                                              min_margin=0.0))
+    if config["depth"] is not None:
+        bot.max_depth = config["depth"]
+    bot.max_nodes = config["nodes"]
+    return bot
+
+
+def analyse(task):
+    """Une position ; dict de resultats (une ligne de sortie)."""
+    index, (board, scores, player, ply, played, label) = task
+    game = records.to_game(records.Position(board, scores, player, played, None, ply))
+    result = {"index": index, "ply": ply, "player": player, "scores": list(scores)}
+    if label is not None:
+        result["id"] = label
+    if played is not None:
+        result["played"] = move_name(played)
+    if game.is_game_over()[0] or not game.get_valid_moves():
+        result["best"] = None
+        return result
+
+    bot = make_bot(player, _config)
+    start = time.perf_counter()
+    returned = bot.get_best_move(game)
+    # meilleur coup, score, profondeur et variation de la derniere iteration terminee ; le coup
+    # rendu par une iteration interrompue (--nodes, --time) n'a qu'une borne, donnee a part
+    best = bot.last_move if bot.last_move is not None else returned
+    result.update({"best": move_name(best), "score": bot.last_score, "depth": bot.last_depth,
+                   "pv": [move_name(move) for move in bot.principal_variation(game, best, max(bot.last_depth, 1))],
+                   "nodes": bot.node_count, "time": round(time.perf_counter() - start, 4)})
+    if bot.partial is not None:
+        depth, move, bound = bot.partial
+        result["partial"] = {"depth": depth, "move": move_name(move), "bound": bound}
+    if _config["check_played"] and played is not None and game.is_legal(played):
+        if played == best:
+            result["played_score"] = bot.last_score
+        elif bot.last_depth:
+            # meme profondeur que le meilleur coup, sans limite de noeuds ni de temps : seul, le coup
+            # joue irait plus loin avec le meme budget. Bot neuf : la table du premier garde des
+            # entrees plus profondes de l'iteration interrompue
+            played_bot = make_bot(player, dict(_config, depth=bot.last_depth, nodes=None, time=None))
+            played_bot.get_best_move(game, root_moves=[played])
+            result["played_score"] = played_bot.last_score
+            result["nodes"] += played_bot.node_count
+        if result.get("played_score") is not None and result["score"] is not None:
+            result["loss"] = max(0, result["score"] - result["played_score"])
+    return result
+
+
+def completed_lines(path):
+    """Nombre de lignes completes en tete du fichier ; une ligne coupee par l'arret est retiree."""
+    if not os.path.exists(path):
+        return 0
+    done = 0
+    keep = 0
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                if not line.endswith(b"\n") or "index" not in json.loads(line):
+                    break
+            except (ValueError, TypeError):
+                break
+            done += 1
+            keep += len(line)
+    with open(path, "r+b") as f:
+        f.truncate(keep)
+    return done
+
+
+def write_results(results, out):
+    count = 0
+    for result in results:
+        # une ligne complete a la fois : un arret ne perd que les positions en cours
+        out.write(json.dumps(result) + "\n")
+        out.flush()
+        count += 1
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyse de positions par lot (recherches a budget fixe)")
+    parser.add_argument("positions", help="fichier de parties (records.py) ou positions JSON, une par ligne")
+    parser.add_argument("-o", "--output", default=None, help="fichier JSONL de sortie (defaut : stdout)")
+    parser.add_argument("--depth", type=int, default=None, help="profondeur fixe")
+    parser.add_argument("--nodes", type=int, default=None, help="noeuds par position")
+    parser.add_argument("--time", type=float, default=None, help="secondes par position (resultat non reproductible)")
+    parser.add_argument("--check-played", action="store_true", help="chercher aussi le coup joue et son cout")
+    parser.add_argument("--every", type=int, default=1, help="une position sur N")
+    parser.add_argument("--tt", type=int, default=16, help="table de transposition par position (Mo)")
+    parser.add_argument("--weights", default=None, help="poids de l'evaluation (weights.py)")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--resume", action="store_true", help="reprendre apres les lignes deja ecrites")
+    args = parser.parse_args(argv)
+
+    if args.depth is None and args.nodes is None and args.time is None:
+        parser.error("budget manquant : --depth, --nodes ou --time")
+    if args.resume and args.output is None:
+        parser.error("--resume demande --output")
+    if args.output and os.path.exists(args.output) and not args.resume:
+        parser.error(f"{args.output} existe deja (--resume pour continuer)")
+    eval_weights = None
+    if args.weights:
+        eval_weights = weights.load(args.weights)
+        if eval_weights is None:
+            parser.error(f"fichier de poids introuvable : {args.weights}")
+    config = {"depth": args.depth, "nodes": args.nodes, "time": args.time, "tt": args.tt,
+              "weights": eval_weights, "check_played": args.check_played}
+
+    done = completed_lines(args.output) if args.resume else 0
+    tasks = itertools.islice(enumerate(read_positions(args.positions)), done * args.every, None, args.every)
+    # les index restent ceux de l'entree : la reprise et --every donnent les memes lignes
+    out = open(args.output, "a") if args.output else sys.stdout
+    if done:
+        print(f"reprise apres {done} position(s)", file=sys.stderr)
+    start = time.perf_counter()
+    try:
+        if args.workers > 1:
+            with multiprocessing.Pool(args.workers, initializer=_init_worker, initargs=(config,)) as pool:
+                # imap rend les resultats dans l'ordre des positions
+                count = write_results(pool.imap(analyse, tasks, chunksize=1), out)
+        else:
+            _init_worker(config)
+            count = write_results(map(analyse, tasks), out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"{count} position(s) analysee(s) en {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
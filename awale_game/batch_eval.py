@@ -0,0 +1,131 @@
+"""
+Evaluation en lot des feuilles (noeuds a profondeur 1 de la recherche) avec NumPy.
+
+Un noeud a profondeur 1 connait tous ses enfants d'avance : on les joue/dejoue
+pour relever scores + agregats (game.features), on les evalue tous d'un coup,
+et la boucle alpha-beta de bot.py parcourt ensuite le vecteur de valeurs.
+La formule est exactement celle de MinimaxBot.evaluate (verifie par
+check(), et compare en vitesse par bench()).
+
+NumPy est optionnel : sans lui, available() est faux et le bot garde
+l'evaluation une position a la fois.
+
+    python batch_eval.py
+"""
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from bot import WIN_SCORE
+from game import SIDE_SEEDS, MOBILITY, WEAK_HOLES
+from weights import DEFAULT_WEIGHTS, SCALE as WEIGHT_SCALE
+
+# colonnes d'une ligne : scores des deux joueurs puis game.features
+SCORE = 0
+FEATURES = 2
+
+
+def available():
+    return np is not None
+
+
+def leaf_rows(game, moves):
+    """Une ligne (scores + agregats) par coup, dans l'ordre des coups."""
+    rows = []
+    for move in moves:
+        game.make_move(move)
+        rows.append(game.scores + game.features)
+        game.unmake_move()
+    return rows
+
+
+def evaluate_batch(rows, player_id, weights=DEFAULT_WEIGHTS):
+    """Meme resultat que MinimaxBot(player_id, weights=weights).evaluate pour chaque ligne (liste d'entiers)."""
+    if not rows:
+        return []  # joueur bloque : pas d'enfant
+    a = np.array(rows, dtype=np.int64)
+    me = player_id
+    opp = 1 - me
+    my_score = a[:, SCORE + me]
+    opp_score = a[:, SCORE + opp]
+    my_mobility = a[:, FEATURES + MOBILITY + me]
+    values = (weights["score"] * (my_score - opp_score)
+              + weights["capture"] * a[:, FEATURES + WEAK_HOLES + opp]
+              + weights["mobility"] * my_mobility
+              + weights["low_mobility"] * (my_mobility <= 2)
+              + weights["seeds"] * (a[:, FEATURES + SIDE_SEEDS + me] - a[:, FEATURES + SIDE_SEEDS + opp]))
+    # division entiere de numpy = celle de Python (arrondi vers -inf) pour les negatifs
+    values //= WEIGHT_SCALE
+    values = np.where(opp_score > 48, -WIN_SCORE, values)
+    values = np.where(my_score > 48, WIN_SCORE, values)
+    return values.tolist()
+
+
+def _positions(n_games=6, plies=80, seed=1):
+    import random
+    from game import AwaleGame
+
+    rng = random.Random(seed)
+    positions = []
+    for _ in range(n_games):
+        game = AwaleGame()
+        for _ in range(plies):
+            moves = game.get_valid_moves()
+            if not moves or game.is_game_over()[0]:
+                break
+            positions.append((game.clone(), moves))
+            game.make_move(rng.choice(moves))
+    return positions
+
+
+def check():
+    """Evaluation en lot == evaluate sur chaque enfant, pour des positions de parties aleatoires."""
+    from bot import MinimaxBot
+
+    positions = _positions()
+    # poids d'origine et poids quelconques (division par l'echelle comprise)
+    tuned = {"score": 151, "capture": 37, "mobility": 29, "low_mobility": -133, "seeds": 11}
+    for weights in (DEFAULT_WEIGHTS, tuned):
+        for player_id in (0, 1):
+            bot = MinimaxBot(player_id, weights=weights)
+            for game, moves in positions:
+                expected = []
+                for move in moves:
+                    game.make_move(move)
+                    expected.append(bot.evaluate(game))
+                    game.unmake_move()
+                assert evaluate_batch(leaf_rows(game, moves), player_id, weights) == expected, game.board
+    print(f"{len(positions)} positions x 2 joueurs x 2 jeux de poids : identique a evaluate")
+
+
+def bench(repeat=5):
+    """Feuilles/s : evaluate une a une contre leaf_rows + evaluate_batch."""
+    import time
+    from bot import MinimaxBot
+
+    positions = _positions()
+    bot = MinimaxBot(0)
+    n_leaves = sum(len(moves) for _, moves in positions)
+    best_scalar = best_batch = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for game, moves in positions:
+            for move in moves:
+                game.make_move(move)
+                bot.evaluate(game)
+                game.unmake_move()
+        best_scalar = min(best_scalar, time.perf_counter() - start)
+        start = time.perf_counter()
+        for game, moves in positions:
+            evaluate_batch(leaf_rows(game, moves), 0)
+        best_batch = min(best_batch, time.perf_counter() - start)
+    print(f"{n_leaves} feuilles : une a une {n_leaves / best_scalar:.0f}/s, en lot {n_leaves / best_batch:.0f}/s")
+
+
+if __name__ == "__main__":
+    if not available():
+        print("numpy n'est pas installe")
+    else:
+        check()
+        bench()
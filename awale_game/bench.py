@@ -0,0 +1,371 @@
+"""
+Benchmarks sur des positions fixes, pour voir si un changement de game.py ou
+de bot.py rend le moteur plus lent (ou faux).
+
+    python bench.py                 # perft + recherche, compare a la baseline
+    python bench.py --save          # enregistre la baseline de cette machine
+    python bench.py --divide mid 3  # detail du perft par coup racine
+    python bench.py --startup       # lancement du joueur -> reponse a START, contre un budget
+    python bench.py --check 3000    # make/unmake contre le play_move d'origine, parties aleatoires
+
+- perft : nombre de feuilles a la profondeur N (generateur de coups +
+  make/unmake), compare aux valeurs attendues ci-dessous
+- recherche a profondeur fixe : noeuds, temps, noeuds/s
+- verification differentielle (--check) : make_move (tables de semis de game.py)
+  compare coup par coup a reference_play, copie du play_move d'origine (graine
+  par graine) ; plateau, scores, cle, agregats et unmake_move, depuis le depart
+  et depuis des positions a gros tas (semis jusqu'a 96 graines)
+La baseline (JSON) depend de la machine : elle n'est pas versionnee. Code de
+sortie 1 si un perft est faux ou si un debit baisse de plus de --tolerance.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import time
+
+from bot import MinimaxBot
+from game import AwaleGame, END_SEEDS, KIND_NAMES, encode_move, move_name
+from time_manager import TimeManager
+
+ADAPTER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "player_adapter.py")
+# temps max entre le lancement du processus et la reponse a START (premier coup du livre)
+STARTUP_BUDGET = 0.2
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+
+# positions atteintes depuis le depart par des coups aleatoires (graine fixe)
+POSITIONS = {
+    "start": "",
+    "early": "15TR 6TB 11TB 12B 5B 4TR 13TB 10R 5R 12TR 3TB 14TR",
+    "mid": "15TB 12TR 7B 10R 13R 14R 3TR 6B 11R 14TB 5TB 10TR 1TR 16B 7R 14B 15TB 16TR 9TR 12TB "
+           "13TB 4R 13R 4TB 7TB 2B 9TR 14TB 11TR 12R",
+    "late": "3TB 6R 13TB 6TB 7TB 8TR 9B 4TR 7TR 10TR 11B 8TB 13TR 6TB 9TB 10TR 5B 2B 5B 2R 5TB 14B "
+            "11TB 16R 15TB 16TR 3TR 14TR 1TB 6TB 15B 16B 15TB 6R 5TR 12B 9TR 4B 7R 10TR 13R 10B 3TB "
+            "6TB 11R 12TR 7TR 10B 15TB 12B 3TB 4R 11R 4TB 13R 12R 1TR 2B 7R 2R",
+}
+
+# (position, profondeur) -> nombre de feuilles, verifie avec le game.py d'origine (play_move sur des copies)
+PERFT_EXPECTED = {
+    ("start", 3): 30856,
+    ("start", 4): 929896,
+    ("early", 4): 321180,
+    ("mid", 4): 87527,
+    ("late", 4): 51321,
+}
+
+# (position, profondeur) de la recherche a profondeur fixe
+SEARCHES = [("start", 6), ("early", 6), ("mid", 7), ("late", 7)]
+
+
+def load_position(name):
+    game = AwaleGame()
+    for token in POSITIONS[name].split():
+        hole_num, color = re.match(r"(\d+)([A-Z]+)", token).groups()
+        ok, msg = game.play_move(encode_move(int(hole_num) - 1, color))
+        if not ok:
+            raise ValueError(f"position {name} : coup {token} invalide ({msg})")
+    return game
+
+
+def perft(game, depth):
+    """Feuilles a la profondeur depth ; une partie finie avant ne compte pas."""
+    if depth == 0:
+        return 1
+    if game.is_game_over()[0]:
+        return 0
+    total = 0
+    for move in game.get_valid_moves():
+        game.make_move(move)
+        total += perft(game, depth - 1)
+        game.unmake_move()
+    return total
+
+
+def divide(game, depth):
+    counts = {}
+    for move in game.get_valid_moves():
+        game.make_move(move)
+        counts[move_name(move)] = perft(game, depth - 1)
+        game.unmake_move()
+    return counts
+
+
+def reference_play(board, scores, player, hole_idx, color_code):
+    """play_move du game.py d'origine, graine par graine (board : 16 listes [R, B, T], modifies sur place)."""
+    r, b, t = board[hole_idx]
+    if color_code == 'R':
+        board[hole_idx][0] = 0
+        seeds_to_sow, target_mode = ['R'] * r, 'ALL'
+    elif color_code == 'B':
+        board[hole_idx][1] = 0
+        seeds_to_sow, target_mode = ['B'] * b, 'OPPONENT'
+    elif color_code == 'TR':
+        board[hole_idx][2] = 0
+        board[hole_idx][0] = 0
+        seeds_to_sow, target_mode = ['T'] * t + ['R'] * r, 'ALL'
+    else:  # TB
+        board[hole_idx][2] = 0
+        board[hole_idx][1] = 0
+        seeds_to_sow, target_mode = ['T'] * t + ['B'] * b, 'OPPONENT'
+
+    current_idx = hole_idx
+    for seed in seeds_to_sow:
+        while True:
+            current_idx = (current_idx + 1) % 16
+            if current_idx == hole_idx:
+                continue
+            if target_mode == 'OPPONENT' and current_idx % 2 == player:
+                continue
+            break
+        board[current_idx]["RBT".index(seed)] += 1
+
+    # captures en remontant depuis le dernier trou seme
+    curr = current_idx
+    for _ in range(16):
+        total = sum(board[curr])
+        if not 2 <= total <= 3:
+            break
+        scores[player] += total
+        board[curr] = [0, 0, 0]
+        curr = (curr - 1) % 16
+
+
+def random_position(rng):
+    """
+    Position aleatoire avec un tas de 17 a 96 graines dans un trou du joueur au trait,
+    le reste reparti au hasard (souvent en quelques autres tas).
+    """
+    player = rng.randrange(2)
+    pile = rng.randint(17, 96)
+    on_board = rng.randint(pile, 96)
+    board = [0] * 48
+    board[3 * rng.randrange(player, 16, 2) + rng.randrange(3)] = pile
+    others = rng.sample(range(48), rng.randint(1, 5))
+    spread = rng.choice((0.0, 0.2, 0.5))  # part des graines hors des tas
+    for _ in range(on_board - pile):
+        board[rng.randrange(48) if rng.random() < spread else rng.choice(others)] += 1
+    captured = 96 - on_board
+    score = rng.randint(max(0, captured - 48), min(48, captured))
+    game = AwaleGame()
+    game.board = board
+    game.scores = [score, captured - score]
+    game.current_player = player
+    game.key = game.compute_key()
+    game.compute_features()
+    return game
+
+
+def sown(game, move):
+    r, b, t = game.hole(move >> 2)
+    return (r, b, t + r, t + b)[move & 3]
+
+
+def check_moves(game, rng, label, problems, max_moves=None, big_first=False):
+    """
+    Coups aleatoires depuis game, compares a reference_play ; renvoie le plus gros semis joue.
+    big_first : le premier coup seme plus de 16 graines quand c'est possible.
+    """
+    board = [list(game.hole(i)) for i in range(16)]
+    scores = game.scores[:]
+    largest = 0
+    played = 0
+    while not game.is_game_over()[0] and len(problems) < 10 and played != max_moves:
+        moves = game.get_valid_moves()
+        if not moves:
+            break
+        if big_first and not played:
+            moves = [move for move in moves if sown(game, move) > 16] or moves
+        move = rng.choice(moves)
+        largest = max(largest, sown(game, move))
+        before = (game.board[:], game.scores[:], game.key, game.totals[:], game.features[:])
+        reference_play(board, scores, game.current_player, move >> 2, KIND_NAMES[move & 3])
+        game.make_move(move)
+        played += 1
+        where = f"{label}, coup {game.moves_played} ({move_name(move)})"
+        if game.board != [count for hole in board for count in hole] or game.scores != scores:
+            problems.append(f"{where} : plateau ou scores differents de la reference")
+            break
+        expected = game.clone()
+        expected.compute_features()
+        if game.key != game.compute_key() or game.features != expected.features or game.totals != expected.totals:
+            problems.append(f"{where} : cle ou agregats faux apres make_move")
+        game.unmake_move()
+        if (game.board, game.scores, game.key, game.totals, game.features) != before:
+            problems.append(f"{where} : unmake_move ne rend pas la position de depart")
+            break
+        game.make_move(move)
+    return largest
+
+
+def check_against_reference(games, seed=0):
+    """
+    games parties aleatoires depuis le depart, puis games positions aleatoires a gros
+    tas (quelques coups chacune), jouees avec make_move et reference_play.
+    Depuis le depart, un semis depasse rarement 20 graines : les positions a gros tas
+    couvrent le reste des tables (jusqu'a 96 graines, plusieurs tours).
+    Renvoie (liste des differences, plus gros semis joue).
+    """
+    rng = random.Random(seed)
+    problems = []
+    largest = 0
+    for index in range(games):
+        largest = max(largest, check_moves(AwaleGame(), rng, f"partie {index}", problems))
+    for index in range(games):
+        largest = max(largest, check_moves(random_position(rng), rng, f"position {index}", problems, max_moves=8,
+                                             big_first=True))
+    return problems, largest
+
+
+def run_check(games):
+    start = time.perf_counter()
+    problems, largest = check_against_reference(games)
+    print(f"check : {games} parties et {games} positions a gros tas contre le play_move d'origine "
+          f"en {time.perf_counter() - start:.1f}s, semis jusqu'a {largest} graines, "
+          f"{'OK' if not problems else f'{len(problems)} difference(s)'}")
+    for problem in problems:
+        print(f"  {problem}")
+    return 1 if problems else 0
+
+
+def fixed_depth_search(game, depth, eval_cache_mb=0):
+    bot = MinimaxBot(game.current_player, time_manager=TimeManager(move_time=float("inf")),
+                     eval_cache_mb=eval_cache_mb)
+    bot.max_depth = depth
+    start = time.perf_counter()
+    move = bot.get_best_move(game)
+    elapsed = time.perf_counter() - start
+    result = {"move": move_name(move), "score": bot.last_score, "nodes": bot.node_count,
+              "time": round(elapsed, 4), "nps": round(bot.node_count / elapsed)}
+    if bot.eval_cache is not None:
+        result["eval_cache_hit_rate"] = round(bot.eval_cache.hit_rate(), 4)
+    return result
+
+
+def startup_time():
+    """Lancement de player_adapter.py jusqu'a sa reponse a START, comme le fait l'arbitre."""
+    start = time.perf_counter()
+    player = subprocess.Popen([sys.executable, ADAPTER, "Joueur1"], stdin=subprocess.PIPE,
+                              stdout=subprocess.PIPE, text=True)
+    player.stdin.write("START\n")
+    player.stdin.flush()
+    move = player.stdout.readline().strip()
+    elapsed = time.perf_counter() - start
+    player.stdin.write("RESULT FIN 0 0\n")
+    player.stdin.flush()
+    player.wait()
+    return elapsed, move
+
+
+def run_startup(runs, budget):
+    times = []
+    for _ in range(runs):
+        elapsed, move = startup_time()
+        times.append(elapsed)
+    times.sort()
+    median = times[len(times) // 2]
+    print(f"startup : median {median * 1000:.0f} ms (min {times[0] * 1000:.0f}, max {times[-1] * 1000:.0f}), "
+          f"budget {budget * 1000:.0f} ms, premier coup {move}")
+    if median > budget:
+        print("startup : budget depasse")
+        return 1
+    return 0
+
+
+def run_all(repeat=1, eval_cache_mb=0):
+    """Chaque mesure est faite repeat fois, on garde la plus rapide (moins de bruit)."""
+    results = {"perft": {}, "search": {}}
+    for (name, depth), expected in PERFT_EXPECTED.items():
+        game = load_position(name)
+        elapsed = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            nodes = perft(game, depth)
+            elapsed = min(elapsed, time.perf_counter() - start)
+        results["perft"][f"{name}/{depth}"] = {"nodes": nodes, "expected": expected,
+                                               "time": round(elapsed, 4), "nps": round(nodes / elapsed)}
+    for name, depth in SEARCHES:
+        runs = [fixed_depth_search(load_position(name), depth, eval_cache_mb) for _ in range(repeat)]
+        results["search"][f"{name}/{depth}"] = min(runs, key=lambda run: run["time"])
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Affiche les resultats et renvoie la liste des problemes."""
+    problems = []
+    for kind in ("perft", "search"):
+        for label, result in results[kind].items():
+            line = f"{kind:6s} {label:8s} {result['nodes']:>10d} noeuds {result['time']:8.3f}s {result['nps']:>8d}/s"
+            if kind == "perft" and result["nodes"] != result["expected"]:
+                problems.append(f"perft {label} : {result['nodes']} au lieu de {result['expected']}")
+                line += "  FAUX"
+            old = baseline.get(kind, {}).get(label) if baseline else None
+            if old:
+                ratio = result["nps"] / old["nps"]
+                line += f"  {ratio - 1:+.1%}"
+                if ratio < 1 - tolerance:
+                    problems.append(f"{kind} {label} : {result['nps']}/s contre {old['nps']}/s")
+                    line += "  REGRESSION"
+                if kind == "search" and result["nodes"] != old["nodes"]:
+                    # pas une erreur : l'arbre a change (ordre des coups, elagage...)
+                    line += f"  (noeuds : {old['nodes']} avant)"
+            if "eval_cache_hit_rate" in result:
+                line += f"  cache d'evaluation {result['eval_cache_hit_rate']:.1%}"
+            print(line)
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Perft et recherche a profondeur fixe")
+    parser.add_argument("--save", action="store_true", help="ecrire la baseline au lieu de comparer")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--tolerance", type=float, default=0.10, help="baisse de debit toleree (0.10 = 10%%)")
+    parser.add_argument("--repeat", type=int, default=3, help="mesures par test (on garde la meilleure)")
+    parser.add_argument("--startup", action="store_true", help="mesurer seulement le temps de lancement")
+    parser.add_argument("--startup-runs", type=int, default=7)
+    parser.add_argument("--startup-budget", type=float, default=STARTUP_BUDGET, help="secondes")
+    parser.add_argument("--eval-cache", type=int, default=0, metavar="MO",
+                        help="recherches avec un cache d'evaluation de cette taille (eval_cache.py)")
+    parser.add_argument("--check", type=int, nargs="?", const=3000, default=None, metavar="PARTIES",
+                        help="verifier make/unmake contre le play_move d'origine (defaut : 3000 parties)")
+    parser.add_argument("--divide", nargs=2, metavar=("POSITION", "DEPTH"), help="perft detaille par coup")
+    args = parser.parse_args(argv)
+
+    if args.startup:
+        return run_startup(args.startup_runs, args.startup_budget)
+
+    if args.check is not None:
+        return run_check(args.check)
+
+    if args.divide:
+        name, depth = args.divide[0], int(args.divide[1])
+        counts = divide(load_position(name), depth)
+        for move, count in counts.items():
+            print(f"{move:5s} {count}")
+        print(f"total {sum(counts.values())}")
+        return 0
+
+    results = run_all(args.repeat, args.eval_cache)
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        compare(results, None, args.tolerance)
+        print(f"baseline ecrite dans {args.baseline}")
+        return 0
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    problems = compare(results, baseline, args.tolerance)
+    if baseline is None:
+        print("pas de baseline (python bench.py --save)")
+    for problem in problems:
+        print(problem)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
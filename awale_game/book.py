@@ -0,0 +1,126 @@
+"""
+Livre d'ouverture : meilleurs coups precalcules depuis la position de depart.
+
+Fichier binaire : en-tete puis enregistrements (cle Zobrist 64 bits, coup 16 bits,
+l'entier de game.encode_move)
+tries par cle. En partie on l'ouvre en mmap et on cherche la cle par dichotomie :
+rien n'est lu au chargement, une recherche touche une dizaine d'enregistrements.
+
+    python book.py --plies 2 --time 10 --out opening.book
+
+Le constructeur cherche chaque position jusqu'a --plies coups depuis le depart
+(tous les coups des deux joueurs, ou les --width meilleurs) et garde le meilleur coup.
+"""
+import mmap
+import os
+import struct
+import sys
+import time
+
+from game import AwaleGame, ZOBRIST_SIDE, move_name
+
+MAGIC = b"AWOB"
+VERSION = 1
+# magic, version, nombre d'enregistrements, cle de controle (les cles Zobrist n'ont pas change)
+HEADER = struct.Struct("<4sHIQ")
+RECORD = struct.Struct("<QH")
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "opening.book")
+
+
+class OpeningBook:
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.count, check = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} : pas un livre d'ouverture (version {VERSION})")
+        if check != ZOBRIST_SIDE:
+            raise ValueError(f"{path} : construit avec d'autres cles Zobrist, a regenerer")
+        if len(self.data) != HEADER.size + self.count * RECORD.size:
+            raise ValueError(f"{path} : fichier tronque")
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+    def probe(self, game):
+        """Coup du livre pour cette position, ou None."""
+        key = game.key
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            mid_key, move = RECORD.unpack_from(self.data, HEADER.size + mid * RECORD.size)
+            if mid_key == key:
+                return move
+            if mid_key < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+
+def load(path=DEFAULT_PATH):
+    """Livre ouvert en mmap ; None si le fichier n'existe pas."""
+    if not os.path.exists(path):
+        return None
+    return OpeningBook(path)
+
+
+def write(path, entries):
+    """entries : {cle Zobrist : coup}."""
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(entries), ZOBRIST_SIDE))
+        for key in sorted(entries):
+            f.write(RECORD.pack(key, entries[key]))
+
+
+def build(path, plies, move_time, width=None, max_depth=None):
+    from bot import MinimaxBot
+    from time_manager import TimeManager
+
+    entries = {}
+    frontier = [AwaleGame()]
+    for ply in range(plies):
+        next_frontier = []
+        for game in frontier:
+            if game.key in entries or game.is_game_over()[0]:
+                continue
+            bot = MinimaxBot(game.current_player, time_manager=TimeManager(move_time, 0.0, 0.0))
+            if max_depth is not None:
+                bot.max_depth = max_depth
+            move = bot.get_best_move(game)
+            if move is None:
+                continue
+            entries[game.key] = move
+            print(f"ply {ply} {len(entries):5d} : {move_name(move)} "
+                  f"(profondeur {bot.last_depth}, score {bot.last_score})", flush=True)
+            if ply + 1 < plies:
+                # coups a suivre : tous, ou les meilleurs selon l'ordre de la recherche
+                moves = bot.orderer.order(game, game.get_valid_moves(), move, 0)
+                for child_move in moves[:width]:
+                    child = game.clone()
+                    child.make_move(child_move)
+                    next_frontier.append(child)
+        frontier = next_frontier
+    write(path, entries)
+    print(f"{len(entries)} positions ecrites dans {path}")
+
+
+def main(argv=None):
+    import argparse  # seulement pour la ligne de commande : le bot importe ce module au lancement
+    parser = argparse.ArgumentParser(description="Construction du livre d'ouverture")
+    parser.add_argument("--plies", type=int, default=2, help="profondeur du livre en demi-coups")
+    parser.add_argument("--time", type=float, default=10.0, help="secondes de recherche par position")
+    parser.add_argument("--depth", type=int, default=None, help="profondeur max de la recherche")
+    parser.add_argument("--width", type=int, default=None, help="coups suivis par position (tous par defaut)")
+    parser.add_argument("--out", default=DEFAULT_PATH)
+    args = parser.parse_args(argv)
+    start = time.perf_counter()
+    build(args.out, args.plies, args.time, args.width, args.depth)
+    print(f"{time.perf_counter() - start:.0f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,15 +1,90 @@
-import random
 import time
 
+from game import SIDE_SEEDS, MOBILITY, WEAK_HOLES, move_name
+from move_ordering import MoveOrderer, MAX_PLY
+from time_manager import TimeManager
+from weights import DEFAULT_WEIGHTS, SCALE as WEIGHT_SCALE
+from transposition import TranspositionTable, EXACT, LOWER, UPPER
+from eval_cache import EvalCache
+
+# borne de securite seulement : c'est le gestionnaire de temps qui arrete la recherche
+MAX_DEPTH = 100
+WIN_SCORE = 10000
+
+# fenetre d'aspiration autour du score precedent (un peu plus qu'une graine = 10)
+ASPIRATION_WINDOW = 25
+ASPIRATION_MIN_DEPTH = 4
+
+# late move reductions : a partir du LMR_MIN_MOVE-ieme coup, a profondeur >= LMR_MIN_DEPTH
+LMR_MIN_DEPTH = 3
+LMR_MIN_MOVE = 3
+LMR_DEEP_MOVE = 8  # reduction de 2 au dela
+
 class MinimaxBot:
-    def __init__(self, player_id, depth=3):
+    def __init__(self, player_id, depth=3, tt_size_mb=16, randomize=False, seed=None, time_manager=None,
+                 tablebase=None, book=None, batch_eval=False, weights=None, eval_cache_mb=0):
         self.player_id = player_id
+        # poids de evaluate (weights.py), ceux d'origine si pas de fichier de poids
+        self.weights = dict(weights if weights is not None else DEFAULT_WEIGHTS)
         self.depth = depth
-        self.time_limit = 1.9  # marge de securite sur 2s
+        # budget par coup : 2s moins une marge de securite apprise (voir time_manager.py)
+        self.time_manager = time_manager if time_manager is not None else TimeManager()
+        self.max_depth = MAX_DEPTH
+        # budget en noeuds au lieu du temps (tournoi reproductible), None = limite de temps
+        self.max_nodes = None
         self.node_count = 0  # pour verifier timeout regulierement
+        # compteurs de la derniere recherche (voir search_stats)
+        self.interior_nodes = 0
+        self.beta_cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.eval_calls = 0
+        self.search_time = 0.0
+        # resultat de la derniere iteration terminee
+        self.last_depth = 0
+        self.last_score = None
+        self.last_move = None  # coup de cette iteration (celui de last_score et last_depth)
+        self.iterations = []  # (profondeur, coup, score, temps ecoule, noeuds) par iteration terminee
+        # (profondeur, coup, score) quand le coup rendu vient d'une iteration interrompue :
+        # le score est celui de la fenetre de recherche, une borne et pas un score exact
+        self.partial = None
+        # garde entre les coups : on reutilise le travail du coup precedent
+        self.tt = TranspositionTable(tt_size_mb)
+        # evaluations des feuilles deja vues (eval_cache.py), 0 = pas de cache
+        self.eval_cache = EvalCache(eval_cache_mb) if eval_cache_mb else None
+        # un peu de random pour varier, seulement si demande (reproductible avec seed)
+        rng = None
+        if randomize:
+            import random  # pas au lancement du joueur : rien d'aleatoire par defaut
+            rng = random.Random(seed)
+        self.orderer = MoveOrderer(rng)
+        # table de finale (tablebase.py), valeur exacte pour les positions avec peu de graines
+        self.tablebase = tablebase
+        self.tablebase_hits = 0
+        # evaluation en lot des feuilles avec numpy (batch_eval.py), si demande et installe
+        self.batch_eval = None
+        if batch_eval:
+            import batch_eval as batch_module
+            if batch_module.available():
+                self.batch_eval = batch_module
+        # livre d'ouverture (book.py) : coup joue sans recherche si la position y est
+        self.book = book
+        self.from_book = False
+        self.deadline = 0.0
+        # pilotes depuis un autre thread (voir ponder.py) : pas de limite de temps
+        # pendant qu'on reflechit sur le temps adverse, arret immediat si abort
+        self.pondering = False
+        self.abort = False
+        self.root_best = None  # meilleur coup de l'iteration en cours, mis a jour a la racine
+        # options de la recherche (desactivables pour les comparer avec tournament.py)
+        self.aspiration = True
+        self.lmr = True
 
-    def _time_up(self, start):
-        return (time.perf_counter() - start) > self.time_limit
+    def _time_up(self):
+        if self.abort:
+            return True
+        if self.max_nodes is not None:
+            return self.node_count >= self.max_nodes
+        return not self.pondering and time.perf_counter() > self.deadline
 
     def evaluate(self, game):
         my_score = game.scores[self.player_id]
@@ -17,144 +92,362 @@ class MinimaxBot:
         
         # victoire ou defaite immediate
         if my_score > 48:
-            return 10000
+            return WIN_SCORE
         if opp_score > 48:
-            return -10000
-        
-        # indices de mes trous et ceux de l'adversaire
-        my_start = 0 if self.player_id == 0 else 1
-        opp_start = 1 - my_start
-        
-        # compter mes graines et ma mobilite
-        my_seeds = 0
-        my_mobility = 0
-        for i in range(my_start, 16, 2):
-            r, b, t = game.board[i]
-            my_seeds += r + b + t
-            if r > 0: my_mobility += 1
-            if b > 0: my_mobility += 1
-            if t > 0: my_mobility += 2
+            return -WIN_SCORE
         
-        # compter les graines adverses et le potentiel de capture
-        opp_seeds = 0
-        capture_potential = 0
-        for i in range(opp_start, 16, 2):
-            r, b, t = game.board[i]
-            total = r + b + t
-            opp_seeds += total
-            # trous avec 1 ou 2 graines = capturable facilement
-            if total == 1 or total == 2:
-                capture_potential += 3
+        # agregats tenus a jour par make_move : plus besoin de parcourir le plateau
+        me = self.player_id
+        opp = 1 - me
+        features = game.features
+        my_mobility = features[MOBILITY + me]
+        w = self.weights
         
+        # formule finale : score d'abord, puis les bonus secondaires
+        # (trous adverses avec 1 ou 2 graines = capturable facilement, mobilite,
+        # plus de graines que l'adversaire = controle du jeu)
+        value = (w["score"] * (my_score - opp_score)
+                 + w["capture"] * features[WEAK_HOLES + opp]
+                 + w["mobility"] * my_mobility
+                 + w["seeds"] * (features[SIDE_SEEDS + me] - features[SIDE_SEEDS + opp]))
         # penalite si on a peu de mobilite (risque de blocage)
-        mobility_bonus = my_mobility * 2
         if my_mobility <= 2:
-            mobility_bonus -= 10
-        
-        # bonus si on a plus de graines que l'adversaire (controle du jeu)
-        seed_control = (my_seeds - opp_seeds) // 2
-        
-        # formule finale : score * 10 car c'est le plus important
-        # puis les bonus secondaires
-        return (my_score - opp_score) * 10 + capture_potential + mobility_bonus + seed_control
+            value += w["low_mobility"]
+        # poids a l'echelle WEIGHT_SCALE, le score reste entier
+        return value // WEIGHT_SCALE
+
+    def tablebase_score(self, game, tb_value):
+        # resultat final = difference actuelle + ce que la table donne au joueur au trait
+        final = game.scores[self.player_id] - game.scores[1 - self.player_id]
+        final += tb_value if game.current_player == self.player_id else -tb_value
+        if final > 0:
+            return WIN_SCORE
+        if final < 0:
+            return -WIN_SCORE
+        return 0
 
-    def get_best_move(self, game):
+    def get_best_move(self, game, start_time=None, root_moves=None):
         # iterative deepening pour utiliser le max de temps dispo
-        start_time = time.perf_counter()
+        # start_time : moment ou le coup adverse a ete recu, si on le connait
+        # root_moves : sous-ensemble des coups a chercher a la racine (recherche parallele)
+        if start_time is None:
+            start_time = time.perf_counter()
+        self.deadline = start_time + self.time_manager.budget()
         best_move = None
         self.node_count = 0
+        self.interior_nodes = 0
+        self.beta_cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.eval_calls = 0
+        self.tablebase_hits = 0
+        self.last_depth = 0
+        self.last_score = None
+        self.last_move = None
+        self.iterations = []
+        self.partial = None
+        self.from_book = False
+
+        # coup du livre : reponse immediate, le budget reste pour le milieu de partie
+        if self.book is not None and root_moves is None:
+            move = self.book.probe(game)
+            if move is not None and game.is_legal(move):
+                self.from_book = True
+                self.search_time = time.perf_counter() - start_time
+                return move
+
+        # une seule copie par coup : la recherche joue/dejoue sur place (make/unmake)
+        game = game.clone()
+        self.tt.new_search()
+        if self.eval_cache is not None:
+            self.eval_cache.new_search()
+        self.orderer.new_search()
         
-        valid_moves = game.get_valid_moves()
+        valid_moves = root_moves if root_moves is not None else game.get_valid_moves()
         if not valid_moves:
             return None
         
         # au cas ou on timeout direct, on a au moins un coup
         best_move = valid_moves[0]
 
-        # on limite la profondeur max pour eviter les timeouts
-        max_depth_to_search = 5
-
-        for d in range(1, max_depth_to_search + 1):
-            if self._time_up(start_time):
+        best_changed = False
+        for d in range(1, self.max_depth + 1):
+            if self._time_up():
+                break
+            # on ne lance pas une iteration qui n'a aucune chance de finir
+            remaining = self.deadline - time.perf_counter()
+            if not self.pondering and self.max_nodes is None and not self.time_manager.next_iteration_fits(self.iterations, remaining, best_changed):
                 break
             try:
-                move, score = self.minimax_root(game, d, start_time)
+                move, score = self.aspiration_search(game, d, best_move, root_moves)
                 if move is not None:
+                    best_changed = move != best_move
                     best_move = move
+                    self.last_depth = d
+                    self.last_score = score
+                    self.last_move = move
+                    self.iterations.append((d, move, score, time.perf_counter() - start_time, self.node_count))
+                    # gain ou perte forces : chercher plus loin ne changera rien
+                    if abs(score) >= WIN_SCORE:
+                        break
                     
             except TimeoutError:
+                # iteration partielle : le premier coup cherche est l'ancien meilleur,
+                # tout coup qui a fait mieux a cette profondeur est un meilleur choix
+                # last_* restent ceux de la derniere iteration terminee, partial dit d'ou vient le coup
+                if self.root_best is not None:
+                    best_move = self.root_best[0]
+                    self.partial = (d, best_move, self.root_best[1])
                 break
                 
+        self.search_time = time.perf_counter() - start_time
         return best_move
 
-    def minimax_root(self, game, depth, start_time):
-        # point d'entree du minimax, on teste tous les coups
+    def aspiration_search(self, game, depth, pv_move, root_moves):
+        # fenetre etroite autour du score precedent ; si le score sort de la fenetre,
+        # on recommence avec ce cote ouvert
+        if not self.aspiration or depth < ASPIRATION_MIN_DEPTH or self.last_score is None \
+                or abs(self.last_score) >= WIN_SCORE:
+            return self.search_root(game, depth, pv_move, root_moves)
+        alpha = self.last_score - ASPIRATION_WINDOW
+        beta = self.last_score + ASPIRATION_WINDOW
+        while True:
+            move, score = self.search_root(game, depth, pv_move, root_moves, alpha, beta)
+            if score <= alpha:
+                alpha = float('-inf')
+            elif score >= beta:
+                beta = float('inf')
+                pv_move = move  # le coup qui a depasse beta d'abord
+            else:
+                return move, score
+
+    def report(self):
+        if self.from_book:
+            return "book move"
+        partial = ""
+        if self.partial is not None:
+            depth, move, score = self.partial
+            partial = f" (played {move_name(move)} from interrupted depth {depth}, bound {score})"
+        return (f"depth {self.last_depth} score {self.last_score}{partial} nodes {self.node_count}, "
+                f"{self.tt.report()}")
+
+    def search_stats(self):
+        """Statistiques de la derniere recherche, pour stats.py."""
+        iterations = [{"depth": d, "time": round(elapsed, 4), "nodes": nodes, "score": score}
+                      for d, _, score, elapsed, nodes in self.iterations]
+        # facteur de branchement effectif : noeuds de la derniere iteration / ceux de la precedente
+        ebf = None
+        if len(self.iterations) >= 2:
+            last = self.iterations[-1][4] - self.iterations[-2][4]
+            prev = self.iterations[-2][4] - (self.iterations[-3][4] if len(self.iterations) >= 3 else 0)
+            if prev:
+                ebf = round(last / prev, 2)
+        return {
+            "nodes": self.node_count,
+            "nps": round(self.node_count / self.search_time) if self.search_time else 0,
+            "depth": self.last_depth,
+            "score": self.last_score,
+            # coup de depth/score ; "partial" : coup rendu par une iteration interrompue
+            "depth_move": move_name(self.last_move) if self.last_move is not None else None,
+            "partial": ({"depth": self.partial[0], "move": move_name(self.partial[1]), "bound": self.partial[2]}
+                        if self.partial is not None else None),
+            "time": round(self.search_time, 4),
+            "book": self.from_book,
+            "iterations": iterations,
+            "beta_cutoff_rate": round(self.beta_cutoffs / self.interior_nodes, 4) if self.interior_nodes else 0.0,
+            "first_move_cutoff_rate": round(self.first_move_cutoffs / self.beta_cutoffs, 4) if self.beta_cutoffs else 0.0,
+            "ebf": ebf,
+            "eval_calls": self.eval_calls,
+            "tablebase_hits": self.tablebase_hits,
+            "tt_hit_rate": round(self.tt.hit_rate(), 4),
+            "tt_fill": round(self.tt.fill(), 4),
+            "eval_cache_hit_rate": round(self.eval_cache.hit_rate(), 4) if self.eval_cache is not None else None,
+            "margin": round(self.time_manager.margin, 4),
+        }
+
+    def predict_reply(self, game):
+        """Coup adverse le plus probable d'apres la derniere recherche (meilleur coup en table)."""
+        entry = self.tt.probe(game.key)
+        if entry is not None and entry[4] is not None and game.is_legal(entry[4]):
+            return entry[4]
+        return None
+
+    def principal_variation(self, game, first_move, max_length=MAX_PLY):
+        """Variation principale de la derniere recherche : first_move puis les meilleurs coups en table."""
+        if first_move is None:
+            return []
+        game = game.clone()
+        pv = [first_move]
+        game.make_move(first_move)
+        seen = {game.key}
+        while len(pv) < max_length and not game.is_game_over()[0]:
+            entry = self.tt.probe(game.key)
+            if entry is None or entry[4] is None or not game.is_legal(entry[4]):
+                break
+            pv.append(entry[4])
+            game.make_move(entry[4])
+            # cycle possible dans la table (entrees de recherches differentes)
+            if game.key in seen:
+                break
+            seen.add(game.key)
+        return pv
+
+    def search_root(self, game, depth, pv_move=None, root_moves=None, alpha=float('-inf'), beta=float('inf')):
+        # point d'entree de la recherche, on teste tous les coups (ou ceux de root_moves)
+        # le meilleur coup de l'iteration precedente passe en premier, les suivants
+        # sont d'abord cherches en fenetre nulle (PVS)
+        # alpha/beta : fenetre d'aspiration autour du score de l'iteration precedente
+        alpha_orig = alpha
         best_score = float('-inf')
         local_best_move = None
+        self.root_best = None
         
-        valid_moves = game.get_valid_moves()
-        random.shuffle(valid_moves)  # un peu de random pour varier
+        valid_moves = list(root_moves) if root_moves is not None else game.get_valid_moves()
+        valid_moves = self.orderer.order(game, valid_moves, pv_move, 0)
 
-        for move in valid_moves:
-            if self._time_up(start_time):
+        for i, move in enumerate(valid_moves):
+            if self._time_up():
                 raise TimeoutError()
             
-            hole_idx, color = move
-            
-            simulated_game = game.clone()
-            simulated_game.play_move(hole_idx, color)
-            
-            score = self.minimax(simulated_game, depth - 1, float('-inf'), float('inf'), False, start_time)
+            game.make_move(move)
+            if i == 0:
+                score = -self.negamax(game, depth - 1, -beta, -alpha, 1)
+            else:
+                score = -self.negamax(game, depth - 1, -alpha - 1, -alpha, 1)
+                if score > alpha:
+                    # deja prouve meilleur que le coup courant : utilisable si le temps s'arrete ici
+                    self.root_best = (move, score)
+                    if depth > 1 and score < beta:
+                        score = -self.negamax(game, depth - 1, -beta, -alpha, 1)
+            game.unmake_move()
             
             if score > best_score:
                 best_score = score
                 local_best_move = move
+                self.root_best = (move, score)
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                break  # fail high : get_best_move elargit la fenetre
         
+        # seulement si on a vu tous les coups de la racine
+        if root_moves is None:
+            self.tt.store(game.key, depth, self._bound(best_score, alpha_orig, beta), best_score, local_best_move)
         return local_best_move, best_score
 
-    def minimax(self, game, depth, alpha, beta, is_maximizing, start_time):
+    @staticmethod
+    def _bound(value, alpha, beta):
+        if value <= alpha:
+            return UPPER
+        if value >= beta:
+            return LOWER
+        return EXACT
+
+    def evaluate_side(self, game):
+        # negamax : evaluate est vue par nous, on la retourne si c'est a l'adversaire de jouer
+        cache = self.eval_cache
+        if cache is None:
+            value = self.evaluate(game)
+        else:
+            value = cache.probe(game.key)
+            if value is None:
+                value = self.evaluate(game)
+                cache.store(game.key, value)
+        return value if game.current_player == self.player_id else -value
+
+    def negamax(self, game, depth, alpha, beta, ply=1):
+        """Score vu par le joueur au trait (PVS, fail-soft)."""
+        self.node_count += 1
         # check timeout
-        if self._time_up(start_time):
+        if self._time_up():
             raise TimeoutError()
             
-        # fin de recursion
-        is_over, _ = game.is_game_over()
-        if depth == 0 or is_over:
-            return self.evaluate(game)
-
-        if is_maximizing:
-            max_eval = float('-inf')
-            moves = game.get_valid_moves()
-            for move in moves:
-                if self._time_up(start_time):
-                    raise TimeoutError()
-                hole_idx, color = move
-                
-                sim_game = game.clone()
-                sim_game.play_move(hole_idx, color)
-                
-                eval = self.minimax(sim_game, depth - 1, alpha, beta, False, start_time)
-                max_eval = max(max_eval, eval)
-                
-                alpha = max(alpha, eval)
-                if beta <= alpha:
-                    break 
-            return max_eval
+        # fin de recursion (a profondeur 0 on evalue de toute facon : pas besoin de is_game_over)
+        if depth <= 0 or game.is_game_over()[0]:
+            self.eval_calls += 1
+            return self.evaluate_side(game)
+
+        if self.tablebase is not None:
+            tb_value = self.tablebase.probe(game)
+            if tb_value is not None:
+                self.tablebase_hits += 1
+                score = self.tablebase_score(game, tb_value)
+                return score if game.current_player == self.player_id else -score
+
+        # table de transposition : score deja connu ou au moins un bon coup a tester en premier
+        tt_move = None
+        entry = self.tt.probe(game.key)
+        if entry is not None:
+            _, tt_depth, flag, tt_score, tt_move, _ = entry
+            if tt_depth >= depth:
+                if flag == EXACT:
+                    return tt_score
+                if flag == LOWER and tt_score >= beta:
+                    return tt_score
+                if flag == UPPER and tt_score <= alpha:
+                    return tt_score
+
+        # la mobilite compte exactement les coups possibles (R, B, et TR + TB)
+        if not game.features[MOBILITY + game.current_player]:
+            # joueur bloque : la partie s'arrete la
+            self.eval_calls += 1
+            return self.evaluate_side(game)
+
+        self.interior_nodes += 1
+        alpha_orig = alpha
+        killers = self.orderer.killers[ply] if ply < MAX_PLY else ()
+
+        # profondeur 1 : tous les enfants sont des feuilles, evaluees d'un coup
+        # (les compteurs ne comptent que celles que la boucle aurait visitees)
+        leaf_values = None
+        if depth == 1 and self.batch_eval is not None:
+            moves = self.orderer.order(game, game.get_valid_moves(), tt_move, ply)
+            leaf_values = self.batch_eval.evaluate_batch(self.batch_eval.leaf_rows(game, moves), self.player_id,
+                                                           self.weights)
+            if game.current_player != self.player_id:
+                leaf_values = [-value for value in leaf_values]
         else:
-            min_eval = float('inf')
-            moves = game.get_valid_moves()
-            for move in moves:
-                if self._time_up(start_time):
-                    raise TimeoutError()
-                hole_idx, color = move
-                
-                sim_game = game.clone()
-                sim_game.play_move(hole_idx, color)
-                
-                eval = self.minimax(sim_game, depth - 1, alpha, beta, True, start_time)
-                min_eval = min(min_eval, eval)
-                
-                beta = min(beta, eval)
-                if beta <= alpha:
-                    break
-            return min_eval
+            # generes a la demande : rien d'autre n'est genere si le coup de la table coupe
+            moves = self.orderer.moves(game, tt_move, ply)
+
+        value = float('-inf')
+        best_move = None
+        for i, move in enumerate(moves):
+            if self._time_up():
+                raise TimeoutError()
+            if leaf_values is not None:
+                self.node_count += 1
+                self.eval_calls += 1
+                score = leaf_values[i]
+            elif i == 0:
+                game.make_move(move)
+                score = -self.negamax(game, depth - 1, -beta, -alpha, ply + 1)
+                game.unmake_move()
+            else:
+                # coups tardifs et calmes (ni capture ni killer) : cherches moins profond d'abord
+                reduction = 0
+                if (self.lmr and depth >= LMR_MIN_DEPTH and i >= LMR_MIN_MOVE
+                        and move not in killers and not game.capture_gain(move)):
+                    reduction = 2 if i >= LMR_DEEP_MOVE and depth > LMR_MIN_DEPTH else 1
+                game.make_move(move)
+                score = -self.negamax(game, depth - 1 - reduction, -alpha - 1, -alpha, ply + 1)
+                if score > alpha and reduction:
+                    score = -self.negamax(game, depth - 1, -alpha - 1, -alpha, ply + 1)
+                # a profondeur 1 l'enfant est une feuille : sa valeur en fenetre nulle est deja exacte
+                if depth > 1 and alpha < score < beta:
+                    score = -self.negamax(game, depth - 1, -beta, -alpha, ply + 1)
+                game.unmake_move()
+
+            if score > value:
+                value = score
+                best_move = move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                self.beta_cutoffs += 1
+                if i == 0:
+                    self.first_move_cutoffs += 1
+                self.orderer.record_cutoff(game, move, depth, ply)
+                break
+
+        self.tt.store(game.key, depth, self._bound(value, alpha_orig, beta), value, best_move)
+        return value
@@ -0,0 +1,91 @@
+"""
+Relais entre l'arbitre et le serveur de moteur (engine_server.py).
+
+player_adapter.py l'utilise quand AWALE_SERVER est defini : les lignes de
+l'arbitre (stdin) partent vers le serveur avec l'identifiant de la partie, ses
+reponses reviennent sur stdout sans l'identifiant. Pas d'import du jeu ni du bot
+ici, le lancement reste rapide. Serveur absent : on le demarre (detache, il
+survit a la partie) et on reessaie pendant START_WAIT secondes ; sinon run()
+renvoie None et player_adapter joue la partie lui-meme.
+"""
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), "awale_engine.sock")
+START_WAIT = 2.0
+
+
+def socket_path(value):
+    """Chemin du socket pour AWALE_SERVER ("1" = chemin par defaut)."""
+    return DEFAULT_SOCKET if value in ("", "1") else value
+
+
+def connect(path):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def start_server(path):
+    # pas depuis player.exe : le serveur est un script a part
+    if getattr(sys, "frozen", False):
+        return False
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "engine_server.py")
+    try:
+        subprocess.Popen([sys.executable, script, "--socket", path], stdin=subprocess.DEVNULL,
+                         stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+    except OSError:
+        return False
+    return True
+
+
+def connect_or_start(path):
+    sock = connect(path)
+    if sock is not None or not start_server(path):
+        return sock
+    deadline = time.perf_counter() + START_WAIT
+    while sock is None and time.perf_counter() < deadline:
+        time.sleep(0.05)
+        sock = connect(path)
+    return sock
+
+
+def _forward(sock, game_id):
+    """stdin -> serveur, puis EOF quand l'arbitre ferme stdin."""
+    try:
+        for line in sys.stdin:
+            sock.sendall(f"{game_id} {line.rstrip()}\n".encode())
+        sock.sendall(f"{game_id} EOF\n".encode())
+    except OSError:
+        pass
+
+
+def run(player, value):
+    """Joue une partie via le serveur ; code de sortie, ou None si aucun serveur n'est joignable."""
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    sock = connect_or_start(socket_path(value))
+    if sock is None:
+        return None
+    game_id = f"{os.getpid()}-{time.time_ns()}"
+    sock.sendall(f"{game_id} HELLO {player}\n".encode())
+    threading.Thread(target=_forward, args=(sock, game_id), daemon=True).start()
+    prefix = game_id + " "
+    for line in sock.makefile("r"):
+        if not line.startswith(prefix):
+            continue
+        text = line[len(prefix):].rstrip("\n")
+        if text == "END":
+            return 0
+        print(text, flush=True)
+    # serveur arrete en cours de partie
+    return 1
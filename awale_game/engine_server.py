@@ -0,0 +1,220 @@
+"""
+Serveur de moteur : un seul processus joue toutes les parties et garde ses bots
+(table de transposition, historique des coups, livre, table de finale) d'une
+partie a l'autre, au lieu de tout reconstruire a chaque lancement de l'adaptateur.
+
+    AWALE_SERVER=1 java Arbitre ...          (player_adapter.py relaie via engine_client.py)
+    python engine_server.py --socket /tmp/awale_engine.sock
+    python engine_server.py --stdio
+
+Protocole, une ligne par message, identifiant de partie en tete :
+    client -> serveur : "<id> HELLO Joueur1", puis "<id> <ligne de l'arbitre>", "<id> EOF"
+    serveur -> client : "<id> <ligne pour l'arbitre>", puis "<id> END"
+Sur un socket Unix, ou avec --stdio sur stdin/stdout (plusieurs parties sur un flux).
+
+Chaque partie tourne dans son thread avec player_adapter.main et un bot pris dans
+une reserve par joueur, rendu a la fin de la partie. Les reglages (AWALE_ENGINE,
+AWALE_TT_MB, AWALE_PONDER...) sont ceux de l'environnement du serveur. Les
+parties simultanees se partagent le GIL (reflexion comprise) : le serveur evite
+les couts de demarrage, il ne joue pas plus vite plusieurs parties a la fois.
+Sans partie en cours pendant IDLE_TIMEOUT secondes, il s'arrete.
+"""
+import argparse
+import os
+import queue
+import socket
+import sys
+import threading
+import time
+
+import engine_client
+import player_adapter
+
+IDLE_TIMEOUT = 600.0
+
+
+class BotPool:
+    """Bots libres par player_id ; un bot ne sert qu'a une partie a la fois."""
+
+    def __init__(self, factory=player_adapter.make_bot):
+        self.factory = factory
+        self.idle = {0: [], 1: []}
+        self.lock = threading.Lock()
+        self.created = 0
+
+    def acquire(self, player_id):
+        with self.lock:
+            if self.idle[player_id]:
+                return self.idle[player_id].pop()
+            self.created += 1
+        return self.factory(player_id)
+
+    def release(self, bot):
+        if bot is None:
+            return
+        with self.lock:
+            self.idle[bot.player_id].append(bot)
+
+    def warm(self):
+        """Un bot par joueur des le demarrage (livre, table de finale charges)."""
+        for player_id in (0, 1):
+            self.release(self.acquire(player_id))
+
+
+class Session(threading.Thread):
+    """Une partie : les lignes recues pour son identifiant passent par une file."""
+
+    def __init__(self, server, game_id, player, send):
+        super().__init__(daemon=True)
+        self.server = server
+        self.game_id = game_id
+        self.player = player
+        self.send = send
+        self.lines = queue.Queue()
+
+    def run(self):
+        bot = None
+        try:
+            bot = player_adapter.main(self.lines.get, lambda text: self.send(f"{self.game_id} {text}"),
+                                      self.player, self.server.pool.acquire)
+        finally:
+            self.server.pool.release(bot)
+            self.server.end(self.game_id)
+            self.send(f"{self.game_id} END")
+
+
+class EngineServer:
+    def __init__(self, pool=None):
+        self.pool = pool if pool is not None else BotPool()
+        self.sessions = {}
+        self.lock = threading.Lock()
+        self.last_activity = time.monotonic()
+        self.games = 0
+
+    def end(self, game_id):
+        with self.lock:
+            self.sessions.pop(game_id, None)
+            self.last_activity = time.monotonic()
+
+    def idle(self):
+        with self.lock:
+            return not self.sessions and time.monotonic() - self.last_activity > IDLE_TIMEOUT
+
+    def dispatch(self, line, send):
+        """Une ligne du client ; renvoie l'identifiant de la partie concernee (None si ligne ignoree)."""
+        game_id, _, text = line.rstrip("\n").partition(" ")
+        with self.lock:
+            session = self.sessions.get(game_id)
+            if session is None:
+                if not text.startswith("HELLO"):
+                    player_adapter.log(f"Partie inconnue : {line.rstrip()}")
+                    return None
+                session = self.sessions[game_id] = Session(self, game_id, text[5:].strip() or "Joueur1", send)
+                self.games += 1
+                session.start()
+                return game_id
+        # "" = fin de l'entree pour player_adapter.main
+        session.lines.put("" if text == "EOF" else text + "\n")
+        return game_id
+
+    def close_games(self, game_ids):
+        """Client parti : fin d'entree pour ses parties encore en cours."""
+        with self.lock:
+            sessions = [self.sessions[game_id] for game_id in game_ids if game_id in self.sessions]
+        for session in sessions:
+            session.lines.put("")
+
+    def serve_stream(self, lines, write):
+        """Lit les lignes d'un client jusqu'a sa deconnexion ; write(text) doit etre sur entre threads."""
+        game_ids = set()
+        write_lock = threading.Lock()
+
+        def send(text):
+            with write_lock:
+                try:
+                    write(text + "\n")
+                except (OSError, ValueError):
+                    pass  # client deja parti
+
+        for line in lines:
+            game_id = self.dispatch(line, send)
+            if game_id is not None:
+                game_ids.add(game_id)
+        self.close_games(game_ids)
+
+    def serve_connection(self, conn):
+        with conn:
+            self.serve_stream(conn.makefile("r"), lambda text: conn.sendall(text.encode()))
+
+    def serve_unix(self, path):
+        listener = bind(path)
+        if listener is None:
+            print(f"serveur deja actif sur {path}", file=sys.stderr)
+            return 1
+        listener.settimeout(10.0)
+        try:
+            while not self.idle():
+                try:
+                    conn, _ = listener.accept()
+                except socket.timeout:
+                    continue
+                conn.settimeout(None)
+                with self.lock:
+                    self.last_activity = time.monotonic()
+                threading.Thread(target=self.serve_connection, args=(conn,), daemon=True).start()
+        finally:
+            listener.close()
+            os.unlink(path)
+        return 0
+
+    def serve_stdio(self):
+        def write(text):
+            sys.stdout.write(text)
+            sys.stdout.flush()
+
+        self.serve_stream(sys.stdin, write)
+        # on laisse finir les parties en cours (et leurs derniers messages)
+        for session in list(self.sessions.values()):
+            session.join()
+        return 0
+
+
+def bind(path):
+    """Socket en ecoute sur path ; None si un serveur y repond deja (fichier perime supprime)."""
+    if os.path.exists(path):
+        existing = engine_client.connect(path)
+        if existing is not None:
+            existing.close()
+            return None
+        os.unlink(path)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        listener.bind(path)
+    except OSError:
+        # un autre serveur lance au meme moment a pris le chemin
+        listener.close()
+        return None
+    listener.listen(16)
+    return listener
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serveur de moteur qui garde ses bots entre les parties")
+    parser.add_argument("--socket", default=engine_client.socket_path(os.environ.get("AWALE_SERVER", "1")),
+                        help="chemin du socket Unix")
+    parser.add_argument("--stdio", action="store_true", help="protocole sur stdin/stdout au lieu du socket")
+    parser.add_argument("--no-warm", action="store_true", help="ne pas creer les bots avant la premiere partie")
+    args = parser.parse_args(argv)
+    # les logs de make_bot ne portent pas sur un joueur en particulier
+    player_adapter.player_arg = "serveur"
+
+    server = EngineServer()
+    if not args.no_warm:
+        server.pool.warm()
+    if args.stdio:
+        return server.serve_stdio()
+    return server.serve_unix(args.socket)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
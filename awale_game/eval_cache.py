@@ -0,0 +1,45 @@
+from collections import OrderedDict
+
+# taille approximative d'une entree (cle 64 bits, valeur, noeud de l'OrderedDict)
+ENTRY_BYTES = 120
+
+
+class EvalCache:
+    """
+    Valeurs de evaluate deja calculees, par cle Zobrist (elle contient le joueur
+    au trait). Separe de la table de transposition : une entree de la table ne sert
+    pas quand la profondeur ou les bornes ne conviennent pas, l'evaluation si.
+    Taille fixe, on retire l'entree utilisee il y a le plus longtemps (LRU).
+    Le cache depend du bot (player_id, poids) : un cache par bot.
+    """
+
+    def __init__(self, size_mb=4):
+        self.capacity = max(1, (size_mb * 1024 * 1024) // ENTRY_BYTES)
+        self.entries = OrderedDict()
+        self.probes = 0
+        self.hits = 0
+
+    def new_search(self):
+        # les evaluations restent valables d'un coup a l'autre, seuls les compteurs repartent
+        self.probes = 0
+        self.hits = 0
+
+    def probe(self, key):
+        self.probes += 1
+        value = self.entries.get(key)
+        if value is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        return value
+
+    def store(self, key, value):
+        entries = self.entries
+        entries[key] = value
+        if len(entries) > self.capacity:
+            entries.popitem(last=False)
+
+    def hit_rate(self):
+        return self.hits / self.probes if self.probes else 0.0
+
+    def fill(self):
+        return len(self.entries) / self.capacity
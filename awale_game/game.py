@@ -1,30 +1,218 @@
-import copy
+import marshal
+import os
+import sys
+
+# Board layout: one flat list of 48 counters, hole i uses board[3*i : 3*i + 3] = [R, B, T]
+RED, BLUE, TRANSPARENT = 0, 1, 2
+
+# Sowing modes
+ALL = 0       # Sows in all holes
+OPPONENT = 1  # Sows only in opponent holes
+
+# Zobrist keys: one random 64-bit key per (slot, seed count), per (player, score)
+# and one for the side to move. Fixed seed so every process computes the same keys.
+MAX_SEEDS = 96
+
+# The game ends when fewer than END_SEEDS seeds are left on the board
+END_SEEDS = 10
+
+def _build_zobrist():
+    import random
+    rng = random.Random(0xA3A1E)
+    slots = [[rng.getrandbits(64) for _ in range(MAX_SEEDS + 1)] for _ in range(48)]
+    scores = [[rng.getrandbits(64) for _ in range(MAX_SEEDS + 1)] for _ in range(2)]
+    return slots, scores, rng.getrandbits(64)
+
+# Sowing tables, built once (see _load_tables).
+# SOW_TABLE[hole][mode][n]: (((idx, 3 * idx, seeds added), ...), last sown hole,
+#   seeds landing in opponent holes, seeds landing in the last hole) for n seeds sown
+#   from `hole`, in sowing order.
+#   The original hole is always skipped, in OPPONENT mode our own holes are skipped too.
+#   Only the holes that receive seeds are listed.
+# SOW_PATHS[hole][mode][offset]: (idx, 3 * idx) of the path holes starting `offset` steps
+#   after the hole. Colored seeds sown after t Transparent ones get the increments of a
+#   fresh sowing, applied from offset t % lap (a lap is 15 holes, or 8 in OPPONENT mode).
+
+def _build_sow_tables():
+    paths = []
+    table = []
+    # identical entries are shared: less memory, and marshal stores them once in tables.bin
+    shared = {}
+    for hole_idx in range(16):
+        hole_paths = []
+        hole_rows = []
+        for target_mode in (ALL, OPPONENT):
+            path = []
+            for step in range(1, 16):
+                idx = (hole_idx + step) % 16
+                if target_mode == OPPONENT and idx % 2 == hole_idx % 2:
+                    continue
+                path.append(idx)
+            lap = len(path)
+            row = [((), hole_idx, 0, 0)]
+            for n in range(1, MAX_SEEDS + 1):
+                incs = tuple(shared.setdefault(entry, entry) for entry in
+                             ((path[j], 3 * path[j], n // lap + (1 if j < n % lap else 0)) for j in range(min(n, lap))))
+                to_opponent = sum(seeds for idx, _, seeds in incs if idx % 2 != hole_idx % 2)
+                row.append((incs, path[(n - 1) % lap], to_opponent, incs[(n - 1) % lap][2]))
+            hole_paths.append(tuple(tuple(shared.setdefault((idx, 3 * idx), (idx, 3 * idx)) for idx in path[o:] + path[:o])
+                                    for o in range(lap)))
+            hole_rows.append(tuple(row))
+        paths.append(tuple(hole_paths))
+        table.append(tuple(hole_rows))
+    return tuple(paths), tuple(table)
+
+# The tables above are cached in tables.bin next to this file, the way Python caches .pyc
+# files: marshal reads them back in C, far faster than rebuilding them at every startup.
+# Bump TABLES_VERSION whenever a _build_* function changes.
+TABLES_VERSION = 1
+TABLES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tables.bin")
+
+def _build_tables():
+    return _build_zobrist() + _build_sow_tables()
+
+def write_tables(path=TABLES_FILE, tables=None):
+    tmp = f"{path}.{os.getpid()}"
+    with open(tmp, "wb") as f:
+        marshal.dump((TABLES_VERSION, sys.version_info[:2], tables or _build_tables()), f)
+    os.replace(tmp, path)  # never expose a half-written file to a concurrent process
+
+def _load_tables():
+    try:
+        with open(TABLES_FILE, "rb") as f:
+            version, python, tables = marshal.loads(f.read())
+        if version == TABLES_VERSION and python == tuple(sys.version_info[:2]):
+            return tables
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+    tables = _build_tables()
+    try:
+        write_tables(TABLES_FILE, tables)
+    except OSError:
+        pass  # read-only install: rebuild at every startup
+    return tables
+
+ZOBRIST, ZOBRIST_SCORES, ZOBRIST_SIDE, SOW_PATHS, SOW_TABLE = _load_tables()
+
+# Aggregates kept up to date by make_move, indexed by feature + player:
+# seeds on the player's side, mobility (R and B count 1, T counts 2 as it gives TR and TB),
+# number of the player's holes with 1 or 2 seeds (easy captures for the opponent).
+SIDE_SEEDS, MOBILITY, WEAK_HOLES = 0, 2, 4
+
+# color_code -> (color picked with it, takes Transparent first, sowing mode)
+MOVE_KINDS = {
+    'R': (RED, False, ALL),
+    'B': (BLUE, False, OPPONENT),
+    'TR': (RED, True, ALL),      # Transparent as Red
+    'TB': (BLUE, True, OPPONENT), # Transparent as Blue
+}
+
+# Moves are small integers: hole_idx * 4 + kind, kind indexing KIND_NAMES.
+# (hole_idx, color_code) and "3R" strings only exist at the edges (protocol, display).
+KIND_NAMES = ('R', 'B', 'TR', 'TB')
+KIND_INDEX = {name: kind for kind, name in enumerate(KIND_NAMES)}
+N_MOVES = 64
+
+# MOVE_INFO[move]: (hole_idx, 3 * hole_idx, color, takes Transparent first, sowing mode,
+#   slot whose seeds make the move legal)
+def _move_info(move):
+    hole_idx = move >> 2
+    color, with_t, target_mode = MOVE_KINDS[KIND_NAMES[move & 3]]
+    base = 3 * hole_idx
+    return hole_idx, base, color, with_t, target_mode, base + (TRANSPARENT if with_t else color)
+
+MOVE_INFO = tuple(_move_info(move) for move in range(N_MOVES))
+
+NO_SEEDS_MESSAGES = ("No Red seeds in this hole.", "No Blue seeds in this hole.",
+                     "No Transparent seeds in this hole.", "No Transparent seeds in this hole.")
+
+def encode_move(hole_idx, color_code):
+    """Integer move for (hole_idx 0-15, 'R'|'B'|'TR'|'TB'), None if either is out of range."""
+    kind = KIND_INDEX.get(color_code)
+    if kind is None or not 0 <= hole_idx < 16:
+        return None
+    return hole_idx * 4 + kind
+
+def decode_move(move):
+    """(hole_idx, color_code) of an integer move."""
+    return move >> 2, KIND_NAMES[move & 3]
+
+def move_name(move):
+    """Protocol / display form: "3R" for hole_idx 2 played Red."""
+    return f"{(move >> 2) + 1}{KIND_NAMES[move & 3]}"
+
 
 class AwaleGame:
     def __init__(self):
         # 16 holes, each with [Red, Blue, Transparent]
         # Index 0-15. 
-        # Player 0 (Odd holes in UI 1..15) -> Indices 0, 2, 4... wait.
         # Rules: "First player has the odd holes (1, 3..), second player has even holes (2, 4..)"
         # Let's map UI 1-16 to Internal 0-15.
         # Player 0 owns: 0, 2, 4, 6, 8, 10, 12, 14 (Indices are 0-based, so Hole 1 is Index 0)
         # Player 1 owns: 1, 3, 5, 7, 9, 11, 13, 15
         
-        self.board = [[2, 2, 2] for _ in range(16)] # [R, B, T]
+        self.board = [2] * 48 # [R, B, T] x 16, see layout above
         self.scores = [0, 0] # Player 0, Player 1
         self.current_player = 0 # 0 starts
         self.moves_played = 0 # Track number of moves
-        self.history = [] # To store moves if needed
+        self.history = [] # Undo records pushed by make_move
         self.winner = None
+        self.key = self.compute_key() # Zobrist key, kept up to date by make/unmake
+        self.compute_features()
 
     def clone(self):
-        """Creates a deep copy of the game state for simulation."""
-        return copy.deepcopy(self)
+        """
+        Creates a copy of the game state for simulation, with an empty history:
+        the copy cannot unmake the moves played before it was made (the undo
+        records hold the features list and would be shared with the original).
+        """
+        other = AwaleGame.__new__(AwaleGame)
+        other.board = self.board[:]
+        other.scores = self.scores[:]
+        other.current_player = self.current_player
+        other.moves_played = self.moves_played
+        other.history = []
+        other.winner = self.winner
+        other.key = self.key
+        other.totals = self.totals[:]
+        other.features = self.features[:]
+        return other
 
     def set_state(self, board_values, score_p1, score_p2):
         """Force l'état du jeu (utilisé quand le serveur nous envoie le plateau)."""
-        self.board = copy.deepcopy(board_values)
+        self.board = [count for hole in board_values for count in hole]
         self.scores = [score_p1, score_p2]
+        self.history = []
+        self.key = self.compute_key()
+        self.compute_features()
+
+    def compute_key(self):
+        """Zobrist key of the position computed from scratch."""
+        key = 0
+        for slot, count in enumerate(self.board):
+            key ^= ZOBRIST[slot][count]
+        key ^= ZOBRIST_SCORES[0][self.scores[0]] ^ ZOBRIST_SCORES[1][self.scores[1]]
+        if self.current_player == 1:
+            key ^= ZOBRIST_SIDE
+        return key
+
+    def compute_features(self):
+        """Recomputes hole totals and the aggregates (see SIDE_SEEDS) from scratch."""
+        board = self.board
+        self.totals = [board[3 * i] + board[3 * i + 1] + board[3 * i + 2] for i in range(16)]
+        features = [0] * 6
+        for i in range(16):
+            p = i % 2
+            r, b, t = self.hole(i)
+            features[SIDE_SEEDS + p] += r + b + t
+            features[MOBILITY + p] += (r > 0) + (b > 0) + 2 * (t > 0)
+            features[WEAK_HOLES + p] += 0 < r + b + t < 3
+        self.features = features
+
+    def hole(self, idx):
+        """Returns (r, b, t) for hole idx."""
+        base = 3 * idx
+        return self.board[base], self.board[base + 1], self.board[base + 2]
 
     def display_board(self):
         print(f"\ntour: {self.moves_played + 1}/400")
@@ -34,129 +222,192 @@ class AwaleGame:
         # affichage simple 1-16
         for i in range(16):
             owner = "j1" if i % 2 == 0 else "j2"
-            r, b, t = self.board[i]
+            r, b, t = self.hole(i)
             print(f"trou {i+1:2} ({owner}): {r}R {b}B {t}T")
         print("")
 
     def get_valid_moves(self):
-        """Returns a list of valid moves for current player."""
+        """Returns the list of valid moves (integers, see encode_move) for current player."""
         moves = []
         # Player 0 owns indices 0, 2, 4...
         # Player 1 owns indices 1, 3, 5...
         start_idx = 0 if self.current_player == 0 else 1
         
+        board = self.board
         for i in range(start_idx, 16, 2):
-            r, b, t = self.board[i]
-            if r > 0: moves.append((i, 'R'))
-            if b > 0: moves.append((i, 'B'))
-            if t > 0:
-                moves.append((i, 'TR')) # Transparent as Red
-                moves.append((i, 'TB')) # Transparent as Blue
+            base = 3 * i
+            move = 4 * i
+            if board[base]: moves.append(move)          # R
+            if board[base + 1]: moves.append(move + 1)  # B
+            if board[base + 2]:
+                moves.append(move + 2) # Transparent as Red
+                moves.append(move + 3) # Transparent as Blue
         return moves
 
-    def play_move(self, hole_idx, color_code):
+    def iter_moves(self):
+        """Same moves as get_valid_moves, in the same order, generated one at a time."""
+        board = self.board
+        for i in range(self.current_player, 16, 2):
+            base = 3 * i
+            move = 4 * i
+            if board[base]: yield move
+            if board[base + 1]: yield move + 1
+            if board[base + 2]:
+                yield move + 2
+                yield move + 3
+
+    def is_legal(self, move):
+        """True if move (an integer) is in get_valid_moves(), without building the list."""
+        if not 0 <= move < N_MOVES:
+            return False
+        info = MOVE_INFO[move]
+        return info[0] % 2 == self.current_player and self.board[info[5]] > 0
+
+    def capture_gain(self, move):
+        """Seeds captured in the last sown hole if this move was played (0 if none)."""
+        _, base, color, with_t, target_mode, _ = MOVE_INFO[move]
+        n = self.board[base + color] + (self.board[base + TRANSPARENT] if with_t else 0)
+        _, last_sown_idx, _, on_last = SOW_TABLE[move >> 2][target_mode][n]
+        total = self.totals[last_sown_idx] + on_last
+        return total if 2 <= total <= 3 else 0
+
+    def play_move(self, move):
         """
-        hole_idx: 0-15
-        color_code: 'R', 'B', 'TR', 'TB'
+        Validated move, from outside the search (protocol, user input).
+        move: integer from encode_move (None for an unknown hole or color code)
         """
         # Validation
-        if hole_idx < 0 or hole_idx > 15:
-            return False, "Invalid hole number."
+        if move is None or not 0 <= move < N_MOVES:
+            return False, "Invalid move."
+        hole_idx, _, _, _, _, slot = MOVE_INFO[move]
         
         # Check ownership
         # Player 0 must play even indices (Hole 1, 3...), Player 1 odd indices (Hole 2, 4...)
         if hole_idx % 2 != self.current_player:
             return False, "That hole does not belong to you."
 
-        r, b, t = self.board[hole_idx]
-        
-        seeds_to_sow = []
-        
-        # Determine what seeds we pick up
-        if color_code == 'R':
-            if r == 0: return False, "No Red seeds in this hole."
-            self.board[hole_idx][0] = 0
-            seeds_to_sow = ['R'] * r
-            target_mode = 'ALL' # Sows in all holes
-            
-        elif color_code == 'B':
-            if b == 0: return False, "No Blue seeds in this hole."
-            self.board[hole_idx][1] = 0
-            seeds_to_sow = ['B'] * b
-            target_mode = 'OPPONENT' # Sows only in opponent holes
-            
-        elif color_code == 'TR':
-            if t == 0: return False, "No Transparent seeds in this hole."
-            # Take Transparent AND Red
-            self.board[hole_idx][2] = 0 # Remove T
-            self.board[hole_idx][0] = 0 # Remove R
-            # Transparent distributed FIRST
-            seeds_to_sow = ['T'] * t + ['R'] * r
-            target_mode = 'ALL' # Acts like Red
-            
-        elif color_code == 'TB':
-            if t == 0: return False, "No Transparent seeds in this hole."
-            # Take Transparent AND Blue
-            self.board[hole_idx][2] = 0 # Remove T
-            self.board[hole_idx][1] = 0 # Remove B
-            # Transparent distributed FIRST
-            seeds_to_sow = ['T'] * t + ['B'] * b
-            target_mode = 'OPPONENT' # Acts like Blue
-            
-        else:
-            return False, "Invalid color code."
+        if not self.board[slot]:
+            return False, NO_SEEDS_MESSAGES[move & 3]
 
-        if not seeds_to_sow:
-             return False, "No seeds to sow."
+        self.make_move(move)
+        return True, "Move successful."
+
+    def make_move(self, move):
+        """
+        Plays a move without validation and pushes an undo record on history.
+        The move must come from get_valid_moves(). Used by the search.
+        """
+        board = self.board
+        totals = self.totals
+        features = self.features
+        player = self.current_player
+        hole_idx, base, color, with_t, target_mode, _ = MOVE_INFO[move]
+        undo_key = self.key
+        undo_features = features[:]
+
+        # Determine what seeds we pick up
+        # Transparent seeds are distributed FIRST, then the chosen color
+        key = undo_key
+        taken_c = board[base + color]
+        taken_t = 0
+        if taken_c:
+            board[base + color] = 0
+            key ^= ZOBRIST[base + color][taken_c] ^ ZOBRIST[base + color][0]
+            features[MOBILITY + player] -= 1
+        if with_t:
+            taken_t = board[base + TRANSPARENT]
+            board[base + TRANSPARENT] = 0
+            key ^= ZOBRIST[base + TRANSPARENT][taken_t] ^ ZOBRIST[base + TRANSPARENT][0]
+            features[MOBILITY + player] -= 2
+        total = totals[hole_idx]
+        totals[hole_idx] = total - taken_c - taken_t
+        features[WEAK_HOLES + player] += (0 < total - taken_c - taken_t < 3) - (0 < total < 3)
 
         # --- SOWING PROCESS ---
-        current_idx = hole_idx
-        last_sown_idx = -1
-        
-        for seed in seeds_to_sow:
-            while True:
-                current_idx = (current_idx + 1) % 16
-                
-                # Skip original hole
-                if current_idx == hole_idx:
-                    continue
-                
-                # Check constraints based on color/mode
-                # If mode is OPPONENT, we only sow in opponent's holes
-                # Opponent of P0 (Even indices) is P1 (Odd indices)
-                # Opponent of P1 (Odd indices) is P0 (Even indices)
-                
-                is_opponent_hole = (current_idx % 2 != self.current_player)
-                
-                if target_mode == 'OPPONENT' and not is_opponent_hole:
-                    continue # Skip this hole
-                
-                # If we are here, we can drop the seed
-                break
-            
-            # Drop the seed
-            # If it's a Transparent seed, it stays Transparent in the hole
-            # If it's R or B, it stays R or B
-            if seed == 'R':
-                self.board[current_idx][0] += 1
-            elif seed == 'B':
-                self.board[current_idx][1] += 1
-            elif seed == 'T':
-                self.board[current_idx][2] += 1
-                
-            last_sown_idx = current_idx
+        row = SOW_TABLE[hole_idx][target_mode]
+        for idx, slot, n in row[taken_t][0]:
+            slot += TRANSPARENT
+            before = board[slot]
+            board[slot] = before + n
+            key ^= ZOBRIST[slot][before] ^ ZOBRIST[slot][before + n]
+            if not before:
+                features[MOBILITY + (idx & 1)] += 2
+            total = totals[idx]
+            totals[idx] = total + n
+            if total < 3:
+                features[WEAK_HOLES + (idx & 1)] += (total + n < 3) - (total > 0)
+        # then the colored seeds, continuing where the Transparent ones stopped
+        paths = SOW_PATHS[hole_idx][target_mode]
+        for (idx, slot), (_, _, n) in zip(paths[taken_t % len(paths)], row[taken_c][0]):
+            slot += color
+            before = board[slot]
+            board[slot] = before + n
+            key ^= ZOBRIST[slot][before] ^ ZOBRIST[slot][before + n]
+            if not before:
+                features[MOBILITY + (idx & 1)] += 1
+            total = totals[idx]
+            totals[idx] = total + n
+            if total < 3:
+                features[WEAK_HOLES + (idx & 1)] += (total + n < 3) - (total > 0)
+        _, last_sown_idx, to_opponent, _ = row[taken_t + taken_c]
+        features[SIDE_SEEDS + player] -= to_opponent
+        features[SIDE_SEEDS + 1 - player] += to_opponent
+        self.key = key
 
         # --- CAPTURE PROCESS ---
         # Check capture starting from last_sown_idx and moving backwards
-        self._check_capture(last_sown_idx)
-        
+        captures, captured_total = self._check_capture(last_sown_idx)
+
+        self.history.append((hole_idx, color, with_t, target_mode, taken_t, taken_c, captures, captured_total,
+                             undo_key, undo_features))
+
         # Switch player
-        self.current_player = 1 - self.current_player
+        self.current_player = 1 - player
         self.moves_played += 1
-        return True, "Move successful."
+        self.key ^= ZOBRIST_SIDE
+
+    def unmake_move(self):
+        """Undoes the last move played with make_move/play_move."""
+        (hole_idx, color, with_t, target_mode, taken_t, taken_c, captures, captured_total,
+         self.key, self.features) = self.history.pop()
+        board = self.board
+        totals = self.totals
+
+        self.moves_played -= 1
+        self.current_player = 1 - self.current_player
+        self.scores[self.current_player] -= captured_total
+
+        # Restore captured holes as they were right after sowing
+        for idx, r, b, t in captures:
+            cbase = 3 * idx
+            board[cbase] = r
+            board[cbase + 1] = b
+            board[cbase + 2] = t
+            totals[idx] = r + b + t
+
+        # Take the sown seeds back and put them in the original hole
+        row = SOW_TABLE[hole_idx][target_mode]
+        for idx, slot, n in row[taken_t][0]:
+            board[slot + TRANSPARENT] -= n
+            totals[idx] -= n
+        paths = SOW_PATHS[hole_idx][target_mode]
+        for (idx, slot), (_, _, n) in zip(paths[taken_t % len(paths)], row[taken_c][0]):
+            board[slot + color] -= n
+            totals[idx] -= n
+        base = 3 * hole_idx
+        board[base + color] = taken_c
+        if with_t:
+            board[base + TRANSPARENT] = taken_t
+        totals[hole_idx] += taken_c + taken_t
 
     def _check_capture(self, start_idx):
+        """Captures backwards from start_idx, returns (captured holes, total)."""
+        board = self.board
+        totals = self.totals
+        features = self.features
+        key = self.key
         curr = start_idx
+        captures = []
         captured_total = 0
         
         # We loop backwards. We need a safety break to avoid infinite loops if board is full of 2s and 3s
@@ -164,13 +415,21 @@ class AwaleGame:
         # We can check at most 16 holes.
         
         for _ in range(16):
-            r, b, t = self.board[curr]
-            total = r + b + t
+            total = totals[curr]
             
             if 2 <= total <= 3:
                 # Capture!
-                self.scores[self.current_player] += total
-                self.board[curr] = [0, 0, 0] # Empty the hole
+                base = 3 * curr
+                r, b, t = board[base], board[base + 1], board[base + 2]
+                captures.append((curr, r, b, t))
+                board[base] = board[base + 1] = board[base + 2] = 0 # Empty the hole
+                totals[curr] = 0
+                key ^= (ZOBRIST[base][r] ^ ZOBRIST[base][0] ^ ZOBRIST[base + 1][b] ^ ZOBRIST[base + 1][0]
+                        ^ ZOBRIST[base + 2][t] ^ ZOBRIST[base + 2][0])
+                owner = curr & 1
+                features[SIDE_SEEDS + owner] -= total
+                features[MOBILITY + owner] -= (r > 0) + (b > 0) + 2 * (t > 0)
+                features[WEAK_HOLES + owner] -= total == 2
                 captured_total += total
                 
                 # Move to previous hole
@@ -178,6 +437,14 @@ class AwaleGame:
             else:
                 # Chain broken
                 break
+
+        if captured_total:
+            player = self.current_player
+            score = self.scores[player]
+            key ^= ZOBRIST_SCORES[player][score] ^ ZOBRIST_SCORES[player][score + captured_total]
+            self.scores[player] = score + captured_total
+        self.key = key
+        return captures, captured_total
                 
     def is_game_over(self):
         # 1. 49 or more seeds
@@ -185,8 +452,8 @@ class AwaleGame:
         if self.scores[1] >= 49: return True, "Player 2 Wins!"
         
         # 2. Less than 10 seeds remaining on board
-        total_on_board = sum(sum(hole) for hole in self.board)
-        if total_on_board < 10:
+        total_on_board = self.features[SIDE_SEEDS] + self.features[SIDE_SEEDS + 1]
+        if total_on_board < END_SEEDS:
             if self.scores[0] > self.scores[1]: return True, "Player 1 Wins (Board < 10)!"
             elif self.scores[1] > self.scores[0]: return True, "Player 2 Wins (Board < 10)!"
             else: return True, "Draw!"
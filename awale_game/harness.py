@@ -0,0 +1,254 @@
+"""
+Matchs entre deux adaptateurs (player_adapter.py, ou player.exe) avec le protocole
+d'Arbitre.java, plusieurs parties en meme temps, et mesure du temps de reponse.
+
+    python harness.py --games 20 --concurrency 4
+    python harness.py --games 8 --env AWALE_PONDER=1 --json latences.json
+    python harness.py --cmd "player.exe {player}" --games 2
+
+Comme l'arbitre : START au premier joueur, chaque reponse transmise a l'autre,
+STARTUP_TIMEOUT secondes pour le premier coup de chaque joueur puis TIMEOUT,
+coup au format 1-16 + R/B/TR/TB ou ligne RESULT, 400 coups au plus. En plus, les
+coups sont rejoues sur un AwaleGame (un coup illegal disqualifie aussi).
+
+Le temps de reponse va de l'ecriture de la ligne (flush compris) a la reception
+de la reponse : il contient les pipes et l'ordonnancement, pas seulement la
+recherche. On donne par joueur p50 / p99 / max, un histogramme, et les coups
+a moins de --near secondes du timeout. Le retard au dela du budget de recherche
+(timeout - marge) donne la marge conseillee, a passer aux joueurs avec AWALE_MARGIN :
+c'est la seule mesure de la marge, le joueur ne voit pas le pipe depuis son processus.
+Les premiers coups (demarrage du processus) sont comptes a part.
+"""
+import argparse
+import asyncio
+import json
+import os
+import shlex
+import sys
+import tempfile
+import time
+
+from game import AwaleGame, encode_move
+from time_manager import SAFETY_MARGIN
+
+TIMEOUT = 2.0
+STARTUP_TIMEOUT = 10.0
+MAX_MOVES = 400
+# les coups qui vont jusqu'a la deadline de la recherche arrivent ~100 ms avant le timeout
+# (SAFETY_MARGIN) : on signale ceux qui ont mange l'essentiel de cette marge
+NEAR_TIMEOUT = 0.04
+# marge conseillee = OVERHEAD_FACTOR * pire retard mesure au dela du budget de recherche
+OVERHEAD_FACTOR = 2.0
+BUCKET = 0.1  # largeur des barres de l'histogramme, en secondes
+
+ADAPTER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "player_adapter.py")
+COLORS = ("R", "B", "TR", "TB")
+
+
+def parse_move(line):
+    """"3R" -> coup entier, None si la ligne n'a pas le format de l'arbitre (\\d{1,2}(R|B|TR|TB))."""
+    i = 0
+    while i < len(line) and line[i].isdigit():
+        i += 1
+    if not 1 <= i <= 2 or line[i:] not in COLORS:
+        return None
+    return encode_move(int(line[:i]) - 1, line[i:])
+
+
+class Player:
+    def __init__(self, name, process):
+        self.name = name
+        self.process = process
+        self.first = True
+
+    async def send(self, line):
+        self.process.stdin.write((line + "\n").encode())
+        await self.process.stdin.drain()
+
+    async def response(self, timeout):
+        try:
+            line = await asyncio.wait_for(self.process.stdout.readline(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        return line.decode().strip() or None
+
+    async def close(self):
+        if self.process.returncode is None:
+            try:
+                self.process.stdin.close()
+                await asyncio.wait_for(self.process.wait(), 1.0)
+            except (asyncio.TimeoutError, OSError):
+                self.process.kill()
+                await self.process.wait()
+
+
+async def spawn(command, player, env, cwd):
+    args = [part.replace("{player}", player) for part in command]
+    process = await asyncio.create_subprocess_exec(*args, stdin=asyncio.subprocess.PIPE,
+                                                   stdout=asyncio.subprocess.PIPE,
+                                                   stderr=asyncio.subprocess.DEVNULL, env=env, cwd=cwd)
+    return Player(player, process)
+
+
+async def play_game(index, command, env, timeout, startup_timeout):
+    """Une partie ; dict avec le resultat et les temps de reponse (secondes) par joueur."""
+    # un dossier par partie : les adaptateurs y ecrivent score_JoueurX.txt
+    with tempfile.TemporaryDirectory(prefix="awale_") as cwd:
+        players = [await spawn(command, "Joueur1", env, cwd), await spawn(command, "Joueur2", env, cwd)]
+        return await referee(index, players, timeout, startup_timeout)
+
+
+async def referee(index, players, timeout, startup_timeout):
+    game = AwaleGame()
+    result = {"game": index, "winner": None, "reason": None, "moves": 0,
+              "latencies": {"Joueur1": [], "Joueur2": []}, "startup": {}}
+    current = 0
+    line = "START"
+    try:
+        while True:
+            player = players[current]
+            limit = startup_timeout if player.first else timeout
+            sent_at = time.perf_counter()
+            await player.send(line)
+            line = await player.response(limit)
+            elapsed = time.perf_counter() - sent_at
+            if line is None:
+                result["winner"], result["reason"] = 1 - current, f"{player.name} : timeout ou sortie fermee"
+                break
+            if player.first:
+                result["startup"][player.name] = elapsed
+                player.first = False
+            else:
+                result["latencies"][player.name].append(elapsed)
+            result["moves"] += 1
+            if line.startswith("RESULT"):
+                # "RESULT <coup> s1 s2" : scores vus par le joueur qui termine
+                parts = line.split()
+                result["reason"] = line
+                if len(parts) >= 4 and parts[-1].isdigit() and parts[-2].isdigit():
+                    s1, s2 = int(parts[-2]), int(parts[-1])
+                    result["winner"] = 0 if s1 > s2 else 1 if s2 > s1 else None
+                break
+            move = parse_move(line)
+            if move is None or not game.play_move(move)[0]:
+                result["winner"], result["reason"] = 1 - current, f"{player.name} : coup invalide {line}"
+                break
+            if result["moves"] >= MAX_MOVES:
+                s1, s2 = game.scores
+                result["winner"] = 0 if s1 > s2 else 1 if s2 > s1 else None
+                result["reason"] = "RESULT LIMIT"
+                break
+            current = 1 - current
+    finally:
+        for player in players:
+            await player.close()
+    return result
+
+
+async def run_games(args, command, env):
+    semaphore = asyncio.Semaphore(args.concurrency)
+    done = 0
+
+    async def one(index):
+        nonlocal done
+        async with semaphore:
+            result = await play_game(index, command, env, args.timeout, args.startup_timeout)
+        done += 1
+        winner = {0: "Joueur1", 1: "Joueur2", None: "nulle"}[result["winner"]]
+        print(f"partie {index + 1:3d} ({done}/{args.games}) : {result['moves']} coups, {winner} - {result['reason']}",
+              flush=True)
+        return result
+
+    return await asyncio.gather(*(one(i) for i in range(args.games)))
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+def histogram(values, limit, width=40):
+    """Lignes de texte, une barre par tranche de BUCKET secondes jusqu'a limit."""
+    n_buckets = int(round(limit / BUCKET)) + 1  # derniere tranche : au dela de limit
+    counts = [0] * n_buckets
+    for value in values:
+        counts[min(n_buckets - 1, int(value / BUCKET))] += 1
+    top = max(counts) or 1
+    lines = []
+    for i, count in enumerate(counts):
+        label = f">= {limit:.1f}" if i == n_buckets - 1 else f"{i * BUCKET:.1f}-{(i + 1) * BUCKET:.1f}"
+        lines.append(f"  {label:>9}s {count:6d} {'#' * round(width * count / top)}")
+    return lines
+
+
+def suggested_margin(latencies, timeout, margin):
+    """(pire retard au dela du budget de recherche timeout - margin, marge conseillee)."""
+    overhead = max(0.0, max(latencies) - (timeout - margin))
+    return overhead, max(SAFETY_MARGIN, round(OVERHEAD_FACTOR * overhead + 0.005, 2))
+
+
+def report(results, timeout, near, margin):
+    print()
+    all_values = []
+    for name in ("Joueur1", "Joueur2"):
+        values = [value for result in results for value in result["latencies"][name]]
+        startup = [result["startup"][name] for result in results if name in result["startup"]]
+        if not values:
+            print(f"{name} : aucun coup mesure")
+            continue
+        all_values.extend(values)
+        near_moves = sorted(((result["game"] + 1, value) for result in results for value in result["latencies"][name]
+                             if value >= timeout - near), key=lambda item: -item[1])
+        print(f"{name} : {len(values)} coups, p50 {percentile(values, 50) * 1000:.0f} ms, "
+              f"p99 {percentile(values, 99) * 1000:.0f} ms, max {max(values) * 1000:.0f} ms ; "
+              f"premier coup max {max(startup) * 1000:.0f} ms")
+        for line in histogram(values, timeout):
+            print(line)
+        if near_moves:
+            print(f"  ATTENTION : {len(near_moves)} coup(s) a moins de {near * 1000:.0f} ms du timeout "
+                  f"(partie, secondes) : {', '.join(f'{g}:{v:.3f}' for g, v in near_moves[:10])}")
+    timeouts = [result for result in results if result["reason"] and "timeout" in result["reason"]]
+    wins = [sum(result["winner"] == p for result in results) for p in (0, 1)]
+    print(f"\nJoueur1 +{wins[0]}, Joueur2 +{wins[1]}, nulles {len(results) - sum(wins)} ; "
+          f"{len(timeouts)} partie(s) perdue(s) au temps")
+    if all_values:
+        overhead, suggested = suggested_margin(all_values, timeout, margin)
+        print(f"marge des joueurs {margin * 1000:.0f} ms, pire retard au dela du budget {overhead * 1000:.0f} ms "
+              f"-> AWALE_MARGIN={suggested}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parties avec le protocole de l'arbitre et temps de reponse")
+    parser.add_argument("--games", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=os.cpu_count() or 1, help="parties en meme temps")
+    parser.add_argument("--cmd", default=None,
+                        help="commande d'un joueur, {player} remplace par Joueur1/Joueur2 "
+                             "(defaut : python -u player_adapter.py {player})")
+    parser.add_argument("--env", action="append", default=[], metavar="CLE=VALEUR",
+                        help="variable d'environnement des joueurs (AWALE_PONDER=1, AWALE_TT_MB=32...)")
+    parser.add_argument("--timeout", type=float, default=TIMEOUT)
+    parser.add_argument("--startup-timeout", type=float, default=STARTUP_TIMEOUT)
+    parser.add_argument("--near", type=float, default=NEAR_TIMEOUT, help="seuil d'alerte avant le timeout (s)")
+    parser.add_argument("--json", default=None, help="ecrire les resultats et tous les temps dans ce fichier")
+    args = parser.parse_args(argv)
+
+    command = shlex.split(args.cmd) if args.cmd else [sys.executable, "-u", ADAPTER, "{player}"]
+    env = dict(os.environ)
+    for item in args.env:
+        key, _, value = item.partition("=")
+        env[key] = value
+
+    start = time.perf_counter()
+    results = asyncio.run(run_games(args, command, env))
+    print(f"{len(results)} parties en {time.perf_counter() - start:.0f}s, {args.concurrency} en meme temps")
+    # marge utilisee par les joueurs (player_adapter.py : AWALE_MARGIN, au moins SAFETY_MARGIN)
+    margin = max(SAFETY_MARGIN, float(env.get("AWALE_MARGIN", SAFETY_MARGIN)))
+    report(results, args.timeout, args.near, margin)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,7 +1,11 @@
-from game import AwaleGame
+from game import AwaleGame, encode_move, move_name
 from bot import MinimaxBot
+import os
 import time
 
+# enregistrement binaire de la partie (voir records.py), desactive par defaut
+RECORD_PATH = os.environ.get("AWALE_RECORD")
+
 def main():
     # initialisation du jeu
     game = AwaleGame()
@@ -28,6 +32,11 @@ def main():
         time.sleep(1)
     
     # print("commandes : '1 r' (trou 1, rouge), '15 tb' (trou 15, transparent en bleu)")
+
+    recorder = None
+    if RECORD_PATH:
+        from records import GameRecorder
+        recorder = GameRecorder(RECORD_PATH)
     
     while True:
         # affichage du plateau a chaque tour
@@ -45,10 +54,11 @@ def main():
             # Petit délai pour qu'on ait le temps de voir ce qui se passe (optionnel)
             # time.sleep(0.5) 
             best_move = bot1.get_best_move(game)
-            if best_move:
-                hole_idx, color = best_move
-                print(f"{hole_idx + 1}{color}")
-                game.play_move(hole_idx, color)
+            if best_move is not None:
+                print(move_name(best_move))
+                if recorder:
+                    recorder.record(game, best_move)
+                game.play_move(best_move)
             else:
                 # print("[bot 1] bloque ou abandon.")
                 break
@@ -60,10 +70,11 @@ def main():
             # Petit délai pour qu'on ait le temps de voir ce qui se passe (optionnel)
             # time.sleep(0.5)
             best_move = bot2.get_best_move(game)
-            if best_move:
-                hole_idx, color = best_move
-                print(f"{hole_idx + 1}{color}")
-                game.play_move(hole_idx, color)
+            if best_move is not None:
+                print(move_name(best_move))
+                if recorder:
+                    recorder.record(game, best_move)
+                game.play_move(best_move)
             else:
                 # print("[bot 2] bloque ou abandon.")
                 break
@@ -103,8 +114,11 @@ def main():
             
             # conversion 1-16 (utilisateur) vers 0-15 (interne)
             hole_idx = hole_num - 1
+            move = encode_move(hole_idx, color)
             
-            success, msg = game.play_move(hole_idx, color)
+            if recorder and move is not None and game.is_legal(move):
+                recorder.record(game, move)
+            success, msg = game.play_move(move)
             if success:
                 # print(f"coup joue : {msg}")
                 pass
@@ -117,5 +131,9 @@ def main():
         except Exception as e:
             pass # print(f"erreur inattendue : {e}")
 
+    if recorder:
+        recorder.end_game(game)
+        recorder.close()
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,313 @@
+"""
+Recherche Monte Carlo (UCT), alternative a MinimaxBot avec la meme interface.
+
+Chaque iteration : descente dans l'arbre par UCB1, ajout d'un noeud, partie
+aleatoire (playout) depuis ce noeud, puis remontee du resultat. Le playout joue
+et dejoue sur la copie de la position faite au debut du coup (make/unmake,
+jamais clone()). Il s'arrete apres rollout_depth coups et prend alors
+evaluate() ramenee a une probabilite de gain (sigmoid(K * evaluation), K de
+tune.py) ; rollout_depth=None joue jusqu'a la fin de la partie.
+
+Les noeuds sont des indices dans des listes paralleles, au plus max_tree_nodes.
+D'un coup a l'autre on garde le sous-arbre de la nouvelle position (notre coup
+puis celui de l'adversaire) et les autres noeuds retournent dans la liste
+libre. Arbre plein : on continue les playouts sans ajouter de noeuds.
+"""
+import math
+import random
+import time
+
+from bot import MinimaxBot
+from game import END_SEEDS, SIDE_SEEDS, MOBILITY
+from time_manager import TimeManager
+from weights import DEFAULT_WEIGHTS
+
+# constante d'exploration de UCB1 (resultats entre 0 et 1)
+EXPLORATION = 1.0
+ROLLOUT_DEPTH = 20
+# pente de la sigmoide evaluation -> probabilite de gain (valeur trouvee par tune.py)
+ROLLOUT_K = 0.014
+MAX_TREE_NODES = 500_000
+
+
+def _finished(game):
+    """Meme test que is_game_over, sans construire de message."""
+    scores = game.scores
+    return (scores[0] >= 49 or scores[1] >= 49 or game.moves_played >= 400
+            or game.features[SIDE_SEEDS] + game.features[SIDE_SEEDS + 1] < END_SEEDS)
+
+
+def _nth_move(board, player, k):
+    """k-ieme coup de get_valid_moves, sans construire la liste."""
+    for i in range(player, 16, 2):
+        base = 3 * i
+        if board[base]:
+            if k == 0:
+                return 4 * i      # R
+            k -= 1
+        if board[base + 1]:
+            if k == 0:
+                return 4 * i + 1  # B
+            k -= 1
+        if board[base + 2]:
+            if k < 2:
+                return 4 * i + 2 + k  # TR ou TB
+            k -= 2
+    return None
+
+
+def _result(game):
+    """Resultat final pour le joueur 0 : 1, 0.5 ou 0 (aussi quand le joueur au trait est bloque)."""
+    s1, s2 = game.scores
+    return 1.0 if s1 > s2 else 0.0 if s1 < s2 else 0.5
+
+
+class MctsBot:
+    # meme evaluation que MinimaxBot (elle n'utilise que player_id et weights)
+    evaluate = MinimaxBot.evaluate
+
+    def __init__(self, player_id, time_manager=None, seed=None, rollout_depth=ROLLOUT_DEPTH,
+                 max_tree_nodes=MAX_TREE_NODES, book=None, weights=None):
+        self.player_id = player_id
+        self.time_manager = time_manager if time_manager is not None else TimeManager()
+        self.weights = dict(weights if weights is not None else DEFAULT_WEIGHTS)
+        self.rng = random.Random(seed)
+        self.rollout_depth = rollout_depth
+        self.max_tree_nodes = max_tree_nodes
+        # budget en playouts au lieu du temps (tournoi reproductible), None = limite de temps
+        self.max_nodes = None
+        self.book = book
+        self.from_book = False
+        self.deadline = 0.0
+        # pilotes par ponder.py, comme pour MinimaxBot
+        self.pondering = False
+        self.abort = False
+        # arbre : un noeud = un indice dans ces listes
+        self.visits = []
+        self.value = []      # somme des resultats pour le joueur qui a joue le coup menant au noeud
+        self.children = []
+        self.untried = []    # coups pas encore developpes
+        self.move = []
+        self.mover = []
+        self.key = []
+        self.free = []
+        self.root = None
+        # compteurs du dernier coup (voir search_stats)
+        self.playouts = 0
+        self.node_count = 0
+        self.reused = 0
+        self.search_time = 0.0
+        self.last_depth = 0
+        self.last_score = None
+
+    # --- stockage des noeuds ---
+
+    def _new_node(self, game, move):
+        """Noeud pour la position de game (atteinte par move) ; None si l'arbre est plein."""
+        if self.free:
+            node = self.free.pop()
+        elif len(self.visits) < self.max_tree_nodes:
+            node = len(self.visits)
+            for column in (self.visits, self.value, self.children, self.untried, self.move, self.mover, self.key):
+                column.append(None)
+        else:
+            return None
+        self.visits[node] = 0
+        self.value[node] = 0.0
+        self.children[node] = []
+        self.untried[node] = [] if _finished(game) else game.get_valid_moves()
+        self.move[node] = move
+        self.mover[node] = 1 - game.current_player
+        self.key[node] = game.key
+        return node
+
+    def _release(self, node, keep=None):
+        """Rend a la liste libre le sous-arbre de node, sauf celui de keep."""
+        stack = [node]
+        while stack:
+            n = stack.pop()
+            if n == keep:
+                continue
+            stack.extend(self.children[n])
+            self.children[n] = self.untried[n] = None
+            self.free.append(n)
+
+    def _tree_size(self):
+        return len(self.visits) - len(self.free)
+
+    def _set_root(self, game):
+        """Reprend le sous-arbre de la position de game s'il existe (notre coup puis le sien)."""
+        old = self.root
+        new_root = None
+        if old is not None:
+            # position deja a la racine (pondering) ou a un ou deux coups de l'ancienne racine
+            candidates = [old]
+            for child in self.children[old]:
+                candidates.append(child)
+                candidates.extend(self.children[child])
+            for node in candidates:
+                if self.key[node] == game.key:
+                    new_root = node
+                    break
+        if new_root is not None:
+            if new_root != old:
+                self._release(old, keep=new_root)
+            self.reused = self.visits[new_root]
+        else:
+            if old is not None:
+                self._release(old)
+            new_root = self._new_node(game, None)
+            self.reused = 0
+        self.root = new_root
+
+    # --- recherche ---
+
+    def _time_up(self):
+        if self.abort:
+            return True
+        if self.max_nodes is not None:
+            return self.playouts >= self.max_nodes
+        return not self.pondering and time.perf_counter() > self.deadline
+
+    def _uct_child(self, node):
+        children = self.children[node]
+        visits = self.visits
+        value = self.value
+        log_n = math.log(visits[node])
+        best = None
+        best_score = -1.0
+        for child in children:
+            n = visits[child]
+            score = value[child] / n + EXPLORATION * math.sqrt(log_n / n)
+            if score > best_score:
+                best_score = score
+                best = child
+        return best
+
+    def _rollout(self, game):
+        """Playout aleatoire depuis game, resultat pour le joueur 0 ; game est remis dans son etat."""
+        rng = self.rng
+        played = 0
+        limit = self.rollout_depth
+        while not _finished(game):
+            if limit is not None and played >= limit:
+                break
+            # l'agregat de mobilite est exactement le nombre de coups (R, B, et TR + TB)
+            n_moves = game.features[MOBILITY + game.current_player]
+            if not n_moves:
+                break  # joueur bloque : la partie s'arrete
+            game.make_move(_nth_move(game.board, game.current_player, int(rng.random() * n_moves)))
+            played += 1
+        if limit is not None and played >= limit and not _finished(game):
+            # coupure : evaluation vue par nous, ramenee au joueur 0
+            p = 1.0 / (1.0 + math.exp(-ROLLOUT_K * self.evaluate(game)))
+            result = p if self.player_id == 0 else 1.0 - p
+        else:
+            result = _result(game)
+        for _ in range(played):
+            game.unmake_move()
+        return result
+
+    def _iterate(self, game):
+        node = self.root
+        path = [node]
+        children = self.children
+        untried = self.untried
+        # selection : descente tant que le noeud est completement developpe
+        while not untried[node] and children[node]:
+            node = self._uct_child(node)
+            game.make_move(self.move[node])
+            path.append(node)
+        # expansion : un nouveau coup, tire au hasard
+        moves = untried[node]
+        if moves:
+            i = int(self.rng.random() * len(moves))
+            move = moves[i]
+            game.make_move(move)
+            child = self._new_node(game, move)
+            if child is None:
+                game.unmake_move()  # arbre plein : playout depuis node
+            else:
+                moves[i] = moves[-1]
+                moves.pop()
+                children[node].append(child)
+                path.append(child)
+        result = self._rollout(game)
+        # remontee : chaque noeud compte le resultat du joueur qui y a mene
+        for n in path:
+            self.visits[n] += 1
+            self.value[n] += result if self.mover[n] == 0 else 1.0 - result
+        for _ in range(len(path) - 1):
+            game.unmake_move()
+        self.playouts += 1
+        if len(path) - 1 > self.last_depth:
+            self.last_depth = len(path) - 1
+
+    def get_best_move(self, game, start_time=None):
+        if start_time is None:
+            start_time = time.perf_counter()
+        self.deadline = start_time + self.time_manager.budget()
+        self.playouts = 0
+        self.last_depth = 0
+        self.last_score = None
+        self.from_book = False
+
+        if self.book is not None:
+            move = self.book.probe(game)
+            if move is not None and game.is_legal(move):
+                self.from_book = True
+                self.search_time = time.perf_counter() - start_time
+                return move
+
+        valid_moves = game.get_valid_moves()
+        if not valid_moves:
+            return None
+
+        # une seule copie par coup : les playouts jouent/dejouent sur place
+        game = game.clone()
+        self._set_root(game)
+        root = self.root
+        if len(valid_moves) > 1:
+            while not self._time_up():
+                self._iterate(game)
+
+        self.search_time = time.perf_counter() - start_time
+        self.node_count = self._tree_size()
+        best = max(self.children[root], key=lambda child: self.visits[child], default=None)
+        if best is None:
+            return valid_moves[0]
+        self.last_score = round(self.value[best] / self.visits[best], 3)
+        return self.move[best]
+
+    def predict_reply(self, game):
+        """Coup adverse le plus visite apres notre coup (game : position apres notre coup)."""
+        if self.root is None:
+            return None
+        for child in self.children[self.root]:
+            if self.key[child] == game.key and self.children[child]:
+                reply = max(self.children[child], key=lambda n: self.visits[n])
+                return self.move[reply]
+        return None
+
+    def playouts_per_second(self):
+        return round(self.playouts / self.search_time) if self.search_time else 0
+
+    def report(self):
+        if self.from_book:
+            return "book move"
+        return (f"mcts playouts {self.playouts} ({self.playouts_per_second()}/s), win rate {self.last_score}, "
+                f"depth {self.last_depth}, tree {self.node_count} nodes ({self.reused} visits reused)")
+
+    def search_stats(self):
+        """Statistiques du dernier coup, pour stats.py (memes cles principales que MinimaxBot)."""
+        return {
+            "engine": "mcts",
+            "nodes": self.node_count,
+            "playouts": self.playouts,
+            "nps": self.playouts_per_second(),
+            "depth": self.last_depth,
+            "score": self.last_score,
+            "time": round(self.search_time, 4),
+            "book": self.from_book,
+            "reused_visits": self.reused,
+        }
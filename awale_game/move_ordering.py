@@ -0,0 +1,76 @@
+from operator import itemgetter
+
+from game import N_MOVES
+
+# priorites : coup PV/TT > captures (les plus grosses d'abord) > killers > historique
+PV_SCORE = 1 << 30
+CAPTURE_SCORE = 1 << 28
+KILLER_SCORE = 1 << 26
+
+MAX_PLY = 128
+
+
+class MoveOrderer:
+    """
+    Ordre des coups pour l'alpha-beta.
+    Les killers sont propres a une recherche (par ply), l'historique est garde
+    d'un coup a l'autre et vieillit a chaque nouvelle recherche.
+    """
+
+    def __init__(self, rng=None):
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+        self.history = [0] * N_MOVES  # indexe par le coup (entier, voir game.encode_move)
+        self.rng = rng  # random.Random optionnel pour departager les coups a egalite
+
+    def new_search(self):
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+        # on divise par 2 : l'historique des anciens coups compte moins
+        self.history = [value >> 1 for value in self.history]
+
+    def order(self, game, moves, first_move=None, ply=0):
+        """Renvoie les coups tries, le meilleur candidat en premier."""
+        if self.rng is not None:
+            self.rng.shuffle(moves)
+        killers = self.killers[ply] if ply < MAX_PLY else (None, None)
+        history = self.history
+        scored = []
+        for move in moves:
+            if move == first_move:
+                score = PV_SCORE
+            else:
+                gain = game.capture_gain(move)
+                if gain:
+                    score = CAPTURE_SCORE + gain
+                elif move == killers[0]:
+                    score = KILLER_SCORE + 1
+                elif move == killers[1]:
+                    score = KILLER_SCORE
+                else:
+                    score = history[move]
+            scored.append((score, move))
+        # tri stable : a score egal on garde l'ordre de generation
+        scored.sort(key=itemgetter(0), reverse=True)
+        return [move for _, move in scored]
+
+    def moves(self, game, tt_move=None, ply=0):
+        """
+        Meme ordre que order(), genere a la demande : le coup de la table est
+        essaye avant de generer les autres, une coupure sur ce coup (le cas le
+        plus frequent) evite la generation et le tri du reste.
+        """
+        if tt_move is not None and game.is_legal(tt_move):
+            yield tt_move
+            yield from self.order(game, [move for move in game.iter_moves() if move != tt_move], None, ply)
+        else:
+            yield from self.order(game, game.get_valid_moves(), None, ply)
+
+    def record_cutoff(self, game, move, depth, ply):
+        """Coupure beta : le coup devient killer a ce ply et gagne en historique."""
+        if game.capture_gain(move):
+            return  # les captures sont deja triees en premier
+        if ply < MAX_PLY:
+            killers = self.killers[ply]
+            if killers[0] != move:
+                killers[1] = killers[0]
+                killers[0] = move
+        self.history[move] += depth * depth
@@ -0,0 +1,184 @@
+import multiprocessing
+import sys
+import time
+
+from bot import MinimaxBot, MAX_DEPTH
+from time_manager import TimeManager
+
+# temps garde pour l'aller-retour des resultats entre processus
+IPC_MARGIN = 0.05
+
+# etat de chaque processus du pool : un bot par joueur, tables gardees d'un coup a l'autre
+_bots = {}
+_tt_size_mb = 16
+_weights = None
+_tablebase = None
+
+
+def _init_worker(tt_size_mb, weights=None, tablebase_path=None):
+    global _tt_size_mb, _weights, _tablebase
+    _tt_size_mb = tt_size_mb
+    _weights = weights
+    if tablebase_path:
+        # chaque processus ouvre sa propre projection du fichier (un mmap ne passe pas par le pool)
+        import tablebase
+        _tablebase = tablebase.load(tablebase_path)
+
+
+def _ping(_):
+    return True
+
+
+def _search_chunk(task):
+    player_id, game, moves, budget, max_depth = task
+    bot = _bots.get(player_id)
+    if bot is None:
+        bot = _bots[player_id] = MinimaxBot(player_id, tt_size_mb=_tt_size_mb, weights=_weights,
+                                                tablebase=_tablebase)
+    # le processus principal a deja retire sa marge : on cherche jusqu'au bout du budget recu
+    bot.time_manager = TimeManager(move_time=budget, safety_margin=0.0, min_margin=0.0)
+    bot.max_depth = max_depth
+    bot.get_best_move(game, root_moves=moves)
+    return bot.iterations, bot.node_count
+
+
+class ParallelSearch:
+    """
+    Recherche sur plusieurs coeurs par decoupage de la racine : chaque processus
+    du pool fait l'iterative deepening sur une partie des coups racine, avec sa
+    propre table de transposition. On garde ensuite la plus grande profondeur
+    terminee par tous les processus et le meilleur coup a cette profondeur.
+    Le pool est cree une seule fois (au lancement), pas a chaque coup.
+    Le livre est consulte ici, avant de distribuer les coups ; la table de finale
+    (tablebase_path) est ouverte par chaque processus et sert dans leurs recherches.
+    Meme interface que MinimaxBot pour player_adapter.
+    """
+
+    def __init__(self, player_id, workers=4, tt_size_mb=16, time_manager=None, weights=None, book=None,
+                 tablebase_path=None):
+        self.player_id = player_id
+        self.workers = workers
+        self.time_manager = time_manager if time_manager is not None else TimeManager()
+        self.max_depth = MAX_DEPTH
+        self.deadline = 0.0
+        self.search_time = 0.0
+        self.node_count = 0
+        self.last_depth = 0
+        self.last_score = None
+        self.book = book
+        self.from_book = False
+        self.pool = multiprocessing.Pool(workers, initializer=_init_worker,
+                                         initargs=(tt_size_mb, weights, tablebase_path))
+        # on force le demarrage des processus tout de suite
+        self.pool.map(_ping, range(workers))
+
+    def close(self):
+        self.pool.terminate()
+
+    def get_best_move(self, game, start_time=None):
+        if start_time is None:
+            start_time = time.perf_counter()
+        deadline = self.deadline = start_time + self.time_manager.budget()
+        self.search_time = 0.0
+        self.node_count = 0
+        self.last_depth = 0
+        self.last_score = None
+        self.from_book = False
+
+        if self.book is not None:
+            move = self.book.probe(game)
+            if move is not None and game.is_legal(move):
+                self.from_book = True
+                self.search_time = time.perf_counter() - start_time
+                return move
+
+        moves = game.get_valid_moves()
+        if len(moves) <= 1:
+            return moves[0] if moves else None
+
+        # captures d'abord puis distribution en tourniquet : chaque processus a de bons coups
+        moves.sort(key=game.capture_gain, reverse=True)
+        n_chunks = min(self.workers, len(moves))
+        chunks = [moves[i::n_chunks] for i in range(n_chunks)]
+
+        snapshot = game.clone()
+        budget = deadline - time.perf_counter() - IPC_MARGIN
+        pending = [self.pool.apply_async(_search_chunk, ((self.player_id, snapshot, chunk, budget, self.max_depth),))
+                   for chunk in chunks]
+
+        results = []
+        for result in pending:
+            try:
+                results.append(result.get(max(0.0, deadline - time.perf_counter())))
+            except multiprocessing.TimeoutError:
+                pass  # processus en retard : on fait sans ses coups
+        results = [(iterations, nodes) for iterations, nodes in results if iterations]
+        if not results:
+            return moves[0]
+
+        # profondeur commune : on ne compare que des scores de meme profondeur
+        depth = min(iterations[-1][0] for iterations, _ in results)
+        best_move = None
+        for iterations, nodes in results:
+            self.node_count += nodes
+            _, move, score, _, _ = iterations[depth - 1]
+            if self.last_score is None or score > self.last_score:
+                best_move = move
+                self.last_score = score
+        self.last_depth = depth
+        self.search_time = time.perf_counter() - start_time
+        return best_move
+
+    def report(self):
+        if self.from_book:
+            return "book move"
+        return f"depth {self.last_depth} score {self.last_score} nodes {self.node_count} ({self.workers} workers)"
+
+    def search_stats(self):
+        """Statistiques du dernier coup (les details par processus restent dans les workers)."""
+        return {
+            "nodes": self.node_count,
+            "nps": round(self.node_count / self.search_time) if self.search_time else 0,
+            "depth": self.last_depth,
+            "score": self.last_score,
+            "time": round(self.search_time, 4),
+            "book": self.from_book,
+            "workers": self.workers,
+            "margin": round(self.time_manager.margin, 4),
+        }
+
+
+def bench(worker_counts=(1, 2, 4, 8), n_positions=6, max_depth=MAX_DEPTH):
+    """Profondeur atteinte et noeuds/s selon le nombre de processus, sur des positions fixes."""
+    import random
+    from game import AwaleGame
+
+    rng = random.Random(1)
+    positions = []
+    game = AwaleGame()
+    while len(positions) < n_positions and not game.is_game_over()[0]:
+        moves = game.get_valid_moves()
+        if not moves:
+            break
+        if game.current_player == 0 and game.moves_played >= 4:
+            positions.append(game.clone())
+        game.play_move(rng.choice(moves))
+
+    print(f"{multiprocessing.cpu_count()} cpu")
+    for workers in worker_counts:
+        search = ParallelSearch(0, workers)
+        search.max_depth = max_depth
+        depths, nodes, elapsed = 0, 0, 0.0
+        for position in positions:
+            start = time.perf_counter()
+            search.get_best_move(position, start)
+            elapsed += time.perf_counter() - start
+            depths += search.last_depth
+            nodes += search.node_count
+        search.close()
+        print(f"{workers} workers: mean depth {depths / len(positions):.2f}, "
+              f"{nodes / elapsed:.0f} nodes/s, mean time {elapsed / len(positions):.2f}s/move")
+
+
+if __name__ == "__main__":
+    bench(tuple(int(w) for w in sys.argv[1:]) or (1, 2, 4, 8))
@@ -1,12 +1,21 @@
 import sys
 import os
-import re
+import time
 
 # Ensure we can import from local modules
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from game import AwaleGame
+# mode serveur (voir engine_server.py) : on relaie les lignes a un moteur deja lance,
+# avant d'importer le jeu et le bot ; sans serveur joignable on joue dans ce processus
+if __name__ == "__main__" and os.environ.get("AWALE_SERVER"):
+    import engine_client
+    code = engine_client.run(sys.argv[1] if len(sys.argv) > 1 else "Joueur1", os.environ["AWALE_SERVER"])
+    if code is not None:
+        sys.exit(code)
+
+from game import AwaleGame, encode_move, move_name
 from bot import MinimaxBot
+from time_manager import TimeManager, SAFETY_MARGIN
 
 # Recuperer l'argument joueur (Joueur1 ou Joueur2) passe par l'arbitre
 # Joueur1 = trous impairs (1,3,5...) = player_id 0 = joue en premier
@@ -14,66 +23,163 @@ from bot import MinimaxBot
 player_arg = sys.argv[1] if len(sys.argv) > 1 else "Joueur1"
 
 # Determiner le player_id en fonction de l'argument
-if player_arg == "Joueur1":
-    ASSIGNED_PLAYER_ID = 0  # Trous impairs, joue en premier
-elif player_arg == "Joueur2":
-    ASSIGNED_PLAYER_ID = 1  # Trous pairs, joue en second
-else:
-    ASSIGNED_PLAYER_ID = None  # Sera determine dynamiquement
+def assigned_player_id(player):
+    if player == "Joueur1":
+        return 0  # Trous impairs, joue en premier
+    if player == "Joueur2":
+        return 1  # Trous pairs, joue en second
+    return None  # Sera determine dynamiquement
+
+ASSIGNED_PLAYER_ID = assigned_player_id(player_arg)
 
 # logs sur stderr, desactive par defaut (plus stable + plus rapide)
 DEBUG = os.environ.get("AWALE_DEBUG", "0") == "1"
 
-def log(*args):
+# taille max de la table de transposition du bot (en Mo)
+TT_SIZE_MB = int(os.environ.get("AWALE_TT_MB", "16"))
+
+# nombre de processus pour la recherche (1 = recherche classique dans ce processus)
+WORKERS = int(os.environ.get("AWALE_WORKERS", "1"))
+
+# table de finale (voir tablebase.py), chemin du fichier ; pas de table par defaut
+TABLEBASE_PATH = os.environ.get("AWALE_TB")
+
+# livre d'ouverture (voir book.py), utilise s'il existe ; AWALE_BOOK= (vide) pour s'en passer
+BOOK_PATH = os.environ.get("AWALE_BOOK", os.path.join(os.path.dirname(os.path.abspath(__file__)), "opening.book"))
+
+# poids de l'evaluation (voir weights.py et tune.py), seulement si demande : par defaut ceux de weights.py
+WEIGHTS_PATH = os.environ.get("AWALE_WEIGHTS")
+
+# moteur de recherche : minimax (defaut) ou mcts (voir mcts.py), AWALE_ENGINE=mcts ou argument --engine=mcts
+ENGINE = os.environ.get("AWALE_ENGINE", "minimax")
+for arg in sys.argv[2:]:
+    if arg.startswith("--engine="):
+        ENGINE = arg.split("=", 1)[1]
+
+# marge de securite par coup en secondes (voir time_manager.py), au moins SAFETY_MARGIN ;
+# a augmenter si harness.py mesure plus de retard (il donne la valeur conseillee)
+MARGIN = float(os.environ.get("AWALE_MARGIN", SAFETY_MARGIN))
+
+# reflexion pendant le temps adverse (desactive par defaut, pas avec plusieurs processus)
+PONDER = os.environ.get("AWALE_PONDER", "0") == "1" and WORKERS <= 1
+
+def log(*args, player=None):
     if DEBUG:
-        print(f"[{player_arg}]", *args, file=sys.stderr)
+        print(f"[{player or player_arg}]", *args, file=sys.stderr)
+
+def make_bot(player_id):
+    eval_weights = None
+    if WEIGHTS_PATH:
+        import weights
+        eval_weights = weights.load(WEIGHTS_PATH)
+        log(f"Poids: {WEIGHTS_PATH} ({'absent' if eval_weights is None else 'charge'})")
+    table = None
+    if TABLEBASE_PATH:
+        import tablebase
+        table = tablebase.load(TABLEBASE_PATH)
+        log(f"Tablebase: {TABLEBASE_PATH} ({'absente' if table is None else f'{table.max_seeds} graines max'})")
+    opening_book = None
+    if BOOK_PATH:
+        import book
+        opening_book = book.load(BOOK_PATH)
+    if WORKERS > 1 and ENGINE != "mcts":
+        from parallel import ParallelSearch
+        # chaque processus du pool ouvre la table de finale lui-meme
+        if table is not None:
+            table.close()
+        return ParallelSearch(player_id, workers=WORKERS, tt_size_mb=TT_SIZE_MB, weights=eval_weights,
+                              book=opening_book, tablebase_path=TABLEBASE_PATH if table is not None else None,
+                              time_manager=TimeManager(safety_margin=MARGIN))
+    if ENGINE == "mcts":
+        from mcts import MctsBot
+        return MctsBot(player_id, book=opening_book, weights=eval_weights, time_manager=TimeManager(safety_margin=MARGIN))
+    return MinimaxBot(player_id=player_id, depth=3, tt_size_mb=TT_SIZE_MB, tablebase=table, book=opening_book,
+                      weights=eval_weights, time_manager=TimeManager(safety_margin=MARGIN))
+
+def parse_move(line):
+    # "3R" / "15TB" -> (3, "R") / (15, "TB") ; None si ce n'est pas un coup
+    # (converti ensuite en coup entier avec encode_move : le reste du code ne voit que des entiers)
+    # (a la main plutot qu'avec re : le module re coute ~10 ms au lancement)
+    i = 0
+    while i < len(line) and line[i].isdigit():
+        i += 1
+    j = i
+    while j < len(line) and "A" <= line[j] <= "Z":
+        j += 1
+    if i == 0 or j == i:
+        return None
+    return int(line[:i]), line[i:j]
 
-def save_score(game):
+def write_stats(stats_writer, bot, game, move_str, received_at, player=None):
+    # rien a faire si AWALE_STATS n'est pas defini
+    if stats_writer is None:
+        return
+    record = {"player": player or player_arg, "ply": game.moves_played, "move": move_str,
+              "response_time": round(time.perf_counter() - received_at, 4)}
+    record.update(bot.search_stats())
+    stats_writer.write(record)
+
+def save_score(game, player=None):
     try:
         s1, s2 = game.scores
-        with open(f"score_{player_arg}.txt", "w") as f:
+        with open(f"score_{player or player_arg}.txt", "w") as f:
             f.write(f"{s1} {s2}")
     except:
         pass
 
-def is_move_really_playable(game, move):
-    hole_idx, color = move
-    if hole_idx < 0 or hole_idx > 15:
-        return False
-    r, b, t = game.board[hole_idx]
-    if color == 'R':
-        return r > 0
-    if color == 'B':
-        return b > 0
-    if color in ('TR', 'TB'):
-        return t > 0
-    return False
-
 def pick_safe_move(game, preferred_move=None):
-    valid_moves = game.get_valid_moves()
-    if preferred_move is not None and preferred_move in valid_moves and is_move_really_playable(game, preferred_move):
+    # is_legal verifie le proprietaire du trou et les graines, sans parcourir la liste des coups
+    if preferred_move is not None and game.is_legal(preferred_move):
         return preferred_move
     
     # Fallback: Prefer reliable moves (R/B) over Special moves (TR/TB) which might be desynced
-    for m in valid_moves:
-        if m[1] in ['R', 'B'] and is_move_really_playable(game, m):
-            return m
-            
-    for m in valid_moves:
-        if is_move_really_playable(game, m):
+    first = None
+    for m in game.iter_moves():
+        if m & 3 < 2:  # R ou B
             return m
-    return None
+        if first is None:
+            first = m
+    return first
+
+def search(bot, game, received_at, profiler=None):
+    # AWALE_PROFILE (voir profiling.py) : le profileur decide s'il enregistre ce coup
+    if profiler is None:
+        return bot.get_best_move(game, received_at)
+    return profiler.search(bot.get_best_move, game, received_at)
+
+def print_line(text):
+    print(text, flush=True)
 
-def main():
-    log(f"Player Adapter Started - {player_arg} (player_id={ASSIGNED_PLAYER_ID})")
+def main(readline=sys.stdin.readline, send=print_line, player=None, bot_factory=make_bot):
+    """
+    Une partie avec l'arbitre : lignes recues par readline, reponses par send.
+    Par defaut stdin/stdout ; engine_server.py l'appelle pour chaque partie, avec
+    ses propres lignes et des bots deja chauds (bot_factory). Renvoie le bot utilise.
+    """
+    player = player or player_arg
+
+    def trace(*args):
+        log(*args, player=player)
+
+    trace(f"Player Adapter Started - {player} (player_id={assigned_player_id(player)})")
     game = AwaleGame()
-    my_player_id = ASSIGNED_PLAYER_ID
-    bot = MinimaxBot(player_id=my_player_id, depth=3) if my_player_id is not None else None
+    my_player_id = assigned_player_id(player)
+    bot = bot_factory(my_player_id) if my_player_id is not None else None
+    ponderer = None
+    stats_writer = None
+    if os.environ.get("AWALE_STATS"):
+        import stats
+        stats_writer = stats.from_env()
+    profiler = None
+    if os.environ.get("AWALE_PROFILE"):
+        import profiling
+        profiler = profiling.from_env(player)
 
     while True:
         try:
-            # Read from stdin
-            line = sys.stdin.readline()
+            # Read from stdin (ou la partie correspondante du serveur)
+            line = readline()
+            received_at = time.perf_counter()
             if not line:
                 break
             
@@ -81,114 +187,151 @@ def main():
             if not line:
                 continue
             
-            log(f"Received: '{line}'")
+            trace(f"Received: '{line}'")
 
             if line == "START":
                 # START means we are First Player (Player 0) - should match Joueur1
                 if my_player_id is None:
                     my_player_id = 0
-                    bot = MinimaxBot(player_id=my_player_id, depth=3)
+                    bot = bot_factory(my_player_id)
                 
                 # We need to make the first move
-                best_move = bot.get_best_move(game)
+                best_move = search(bot, game, received_at, profiler)
+                trace(bot.report())
                 safe_move = pick_safe_move(game, best_move)
-                if safe_move:
-                    hole_idx, color = safe_move
-                    ok, msg = game.play_move(hole_idx, color)
-                    save_score(game)
+                if safe_move is not None:
+                    ok, msg = game.play_move(safe_move)
+                    save_score(game, player)
                     if not ok:
                         # si ca arrive, on prefere arreter plutot que desync
                         s1, s2 = game.scores
-                        print(f"RESULT COUP_INVALIDE {s1} {s2}", flush=True)
+                        send(f"RESULT COUP_INVALIDE {s1} {s2}")
                         break
-                    move_str = f"{hole_idx + 1}{color}"
+                    move_str = move_name(safe_move)
                     
                     # Check if this first move somehow wins immediately (unlikely but safe)
                     is_over, message = game.is_game_over()
                     if is_over:
                         s1, s2 = game.scores
-                        print(f"RESULT {move_str} {s1} {s2}", flush=True)
+                        send(f"RESULT {move_str} {s1} {s2}")
+                        write_stats(stats_writer, bot, game, move_str, received_at, player)
                     else:
-                        print(move_str, flush=True)
+                        send(move_str)
+                        write_stats(stats_writer, bot, game, move_str, received_at, player)
+                        if PONDER:
+                            from ponder import Ponderer
+                            ponderer = Ponderer(bot)
+                            ponderer.start(game, bot.predict_reply(game))
                         
-                    log(f"Played: {move_str}")
+                    trace(f"Played: {move_str}")
                 else:
-                    print("RESULT BLOCKED 0 0", flush=True)
+                    send("RESULT BLOCKED 0 0")
             
             elif "RESULT" in line:
-                log("Game Over received.")
+                trace("Game Over received.")
+                if ponderer is not None:
+                    ponderer.stop()
                 break
             
             else:
                 # It's an opponent's move
                 # Expected format: "3R" or "15TB"
-                match = re.match(r"(\d+)([A-Z]+)", line)
-                if match:
-                    hole_num = int(match.group(1))
-                    color = match.group(2)
-                    hole_idx = hole_num - 1 # Convert 1-based to 0-based
+                parsed = parse_move(line)
+                if parsed:
+                    hole_num, color = parsed
+                    # Convert 1-based to 0-based, then to the integer move (None if out of range)
+                    opp_move = encode_move(hole_num - 1, color)
+
+                    # Reflexion en cours : on la continue si le coup etait prevu, sinon on l'arrete
+                    best_move = None
+                    if ponderer is not None and ponderer.active():
+                        if opp_move == ponderer.predicted_move:
+                            trace("Ponder hit")
+                            best_move = ponderer.hit(received_at)
+                        else:
+                            trace(f"Ponder miss (expected {move_name(ponderer.predicted_move)})")
+                            ponderer.stop()
                     
                     # Apply opponent move
-                    success, msg = game.play_move(hole_idx, color)
-                    save_score(game)
+                    success, msg = game.play_move(opp_move)
+                    save_score(game, player)
                     if not success:
                         # si on continue, on desync et ensuite on joue n'importe quoi.
                         # donc on termine proprement.
                         s1, s2 = game.scores
-                        print(f"RESULT INVALID_OPP_MOVE {s1} {s2}", flush=True)
+                        send(f"RESULT INVALID_OPP_MOVE {s1} {s2}")
                         break
                     
                     # Check if game over after opponent move
                     is_over, message = game.is_game_over()
                     if is_over:
-                        log(f"Game Over detected after receive: {message}")
+                        trace(f"Game Over detected after receive: {message}")
                         s1, s2 = game.scores
                         # We use the opponent's move 'line' as the 'coup' that ended the game
-                        print(f"RESULT {line} {s1} {s2}", flush=True)
+                        send(f"RESULT {line} {s1} {s2}")
                         break
                     
                     # Si le bot n'est pas encore initialise (fallback), le creer maintenant
                     if bot is None:
                         if my_player_id is None:
                             my_player_id = 1  # Par defaut si pas d'argument
-                        bot = MinimaxBot(player_id=my_player_id, depth=3)
+                        bot = bot_factory(my_player_id)
                     
                     # My turn
-                    best_move = bot.get_best_move(game)
+                    if best_move is None:
+                        best_move = search(bot, game, received_at, profiler)
+                    trace(bot.report())
                     safe_move = pick_safe_move(game, best_move)
-                    if safe_move:
-                        hole_idx, color = safe_move
-                        ok, msg = game.play_move(hole_idx, color)
+                    if safe_move is not None:
+                        ok, msg = game.play_move(safe_move)
                         if not ok:
                             s1, s2 = game.scores
-                            print(f"RESULT COUP_INVALIDE {s1} {s2}", flush=True)
+                            send(f"RESULT COUP_INVALIDE {s1} {s2}")
                             break
-                        move_str = f"{hole_idx + 1}{color}"
+                        move_str = move_name(safe_move)
                         
                         # Check if my move resulted in Game Over
                         is_over, message = game.is_game_over()
                         if is_over:
-                             log(f"Game Over detected after move: {message}")
+                             trace(f"Game Over detected after move: {message}")
                              s1, s2 = game.scores
-                             print(f"RESULT {move_str} {s1} {s2}", flush=True)
+                             send(f"RESULT {move_str} {s1} {s2}")
+                             write_stats(stats_writer, bot, game, move_str, received_at, player)
                              break
                         else:
-                             print(move_str, flush=True)
+                             send(move_str)
+                             write_stats(stats_writer, bot, game, move_str, received_at, player)
+                             if PONDER:
+                                 if ponderer is None:
+                                     from ponder import Ponderer
+                                     ponderer = Ponderer(bot)
+                                 ponderer.start(game, bot.predict_reply(game))
                              
-                        log(f"Played: {move_str}")
+                        trace(f"Played: {move_str}")
                     else:
                         # Cannot move
-                        log("No more moves possible")
+                        trace("No more moves possible")
                         s1, s2 = game.scores
-                        print(f"RESULT BLOCKED {s1} {s2}", flush=True)
+                        send(f"RESULT BLOCKED {s1} {s2}")
                         break
                         
                 else:
-                    log(f"Unknown command: {line}")
+                    trace(f"Unknown command: {line}")
 
         except Exception as e:
-            log(f"Error in player loop: {e}")
+            trace(f"Error in player loop: {e}")
             break
 
+    # le bot peut resservir (serveur) : pas de reflexion qui continue en arriere-plan
+    if ponderer is not None:
+        ponderer.stop()
+    if stats_writer is not None:
+        stats_writer.close()
+    return bot
+
 if __name__ == "__main__":
+    # necessaire pour le pool de processus dans player.exe (Windows) ; inutile (et lent a importer) sinon
+    if getattr(sys, "frozen", False):
+        import multiprocessing
+        multiprocessing.freeze_support()
     main()
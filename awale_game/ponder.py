@@ -0,0 +1,59 @@
+import threading
+
+
+class Ponderer:
+    """
+    Reflexion sur le temps de l'adversaire.
+    Apres notre coup on suppose que l'adversaire jouera le coup prevu par la
+    recherche et on cherche deja notre reponse dans un thread, pendant que le
+    thread principal attend sur stdin.
+    - coup prevu joue (ponder hit) : la recherche continue, avec le budget normal
+      compte a partir de la reception du coup
+    - autre coup (ponder miss) : on arrete la recherche tout de suite, la table
+      de transposition garde ce qui a ete calcule
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.thread = None
+        self.predicted_move = None
+        self.result = None
+
+    def active(self):
+        return self.thread is not None
+
+    def start(self, game, predicted_move):
+        if predicted_move is None:
+            return
+        position = game.clone()
+        position.make_move(predicted_move)
+        if position.is_game_over()[0]:
+            return
+        self.predicted_move = predicted_move
+        self.result = None
+        # avant de lancer le thread, pour ne pas ecraser un hit/stop qui arriverait tres vite
+        self.bot.abort = False
+        self.bot.pondering = True
+        self.thread = threading.Thread(target=self._run, args=(position,), daemon=True)
+        self.thread.start()
+
+    def _run(self, position):
+        self.result = self.bot.get_best_move(position)
+
+    def hit(self, received_at):
+        """Le coup prevu a ete joue : on donne a la recherche en cours son vrai budget."""
+        self.bot.deadline = received_at + self.bot.time_manager.budget()
+        self.bot.pondering = False
+        self.thread.join()
+        self.thread = None
+        return self.result
+
+    def stop(self):
+        """Coup different (ou fin de partie) : on abandonne la recherche en cours."""
+        if self.thread is None:
+            return
+        self.bot.abort = True
+        self.thread.join()
+        self.thread = None
+        self.bot.abort = False
+        self.bot.pondering = False
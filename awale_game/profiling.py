@@ -0,0 +1,133 @@
+"""
+Profilage de la recherche coup par coup (cProfile), a activer comme AWALE_DEBUG :
+
+    AWALE_PROFILE=1           chaque coup
+    AWALE_PROFILE=every=10    un appel de get_best_move sur 10
+    AWALE_PROFILE=slow=1.5    chaque coup est profile, on ne garde que ceux de plus de 1.5 s
+    AWALE_PROFILE_DIR=...     dossier des fichiers (defaut : profiles)
+
+Un fichier pstats par coup garde, nomme par joueur, processus et numero de coup.
+Le rapport additionne les fichiers d'une partie ou d'un tournoi (tournament.py
+lit aussi AWALE_PROFILE) et classe les fonctions par temps propre :
+
+    python profiling.py profiles/ --top 25
+
+cProfile ralentit la recherche (environ 2x) : a budget de temps fixe le bot
+cherche moins profond, les proportions entre fonctions restent utilisables.
+Seul le thread qui appelle get_best_move est profile (pas la reflexion de
+ponder.py, ni les processus de parallel.py).
+"""
+import argparse
+import cProfile
+import os
+import pstats
+import sys
+import time
+
+DEFAULT_DIR = "profiles"
+
+
+class MoveProfiler:
+    def __init__(self, label, every=1, slow=None, directory=DEFAULT_DIR):
+        self.label = label
+        self.every = max(1, every)
+        self.slow = slow
+        self.directory = directory
+        self.calls = 0
+        self.saved = 0
+
+    def search(self, function, game, *args):
+        """function(game, *args) (get_best_move), profilee selon les reglages."""
+        self.calls += 1
+        if self.slow is None and (self.calls - 1) % self.every:
+            return function(game, *args)
+        profile = cProfile.Profile()
+        start = time.perf_counter()
+        profile.enable()
+        try:
+            return function(game, *args)
+        finally:
+            profile.disable()
+            elapsed = time.perf_counter() - start
+            if self.slow is None or elapsed >= self.slow:
+                self._dump(profile, game.moves_played, elapsed)
+
+    def _dump(self, profile, ply, elapsed):
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"{self.label}_p{os.getpid()}_m{ply:03d}_{elapsed * 1000:.0f}ms.prof"
+        profile.dump_stats(os.path.join(self.directory, name))
+        self.saved += 1
+
+
+def parse_spec(text):
+    """"1" / "every=N" / "slow=SECONDES" -> (every, slow) ; ValueError si illisible."""
+    if text in ("1", "all"):
+        return 1, None
+    key, _, value = text.partition("=")
+    if key == "every":
+        return int(value), None
+    if key == "slow":
+        return 1, float(value)
+    raise ValueError(f"AWALE_PROFILE inconnu : {text} (1, every=N ou slow=SECONDES)")
+
+
+def from_env(label):
+    spec = os.environ.get("AWALE_PROFILE", "0")
+    if spec in ("", "0"):
+        return None
+    every, slow = parse_spec(spec)
+    return MoveProfiler(label, every, slow, os.environ.get("AWALE_PROFILE_DIR", DEFAULT_DIR))
+
+
+def profile_files(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith(".prof"))
+        else:
+            files.append(path)
+    return files
+
+
+def function_name(key):
+    filename, line, name = key
+    if filename == "~":
+        return name  # fonction C (builtins, methodes de list...)
+    return f"{os.path.basename(filename)}:{line}({name})"
+
+
+def report(files, top=25, sort="tottime", out=sys.stdout):
+    """Tableau des fonctions les plus couteuses, additionnees sur tous les fichiers."""
+    stats = pstats.Stats(files[0])
+    for path in files[1:]:
+        stats.add(path)
+    total = stats.total_tt or 1e-9
+    rows = []
+    for key, (_, calls, tottime, cumtime, _) in stats.stats.items():
+        rows.append((function_name(key), calls, tottime, cumtime))
+    column = 2 if sort == "tottime" else 3
+    rows.sort(key=lambda row: -row[column])
+    print(f"{len(files)} coup(s) profile(s), {total:.2f} s au total ({total / len(files) * 1000:.0f} ms par coup)",
+          file=out)
+    print(f"{'fonction':<48} {'appels':>11} {'propre s':>9} {'%':>6} {'cumule s':>9} {'%':>6}", file=out)
+    for name, calls, tottime, cumtime in rows[:top]:
+        print(f"{name[:48]:<48} {calls:>11} {tottime:>9.3f} {100 * tottime / total:>5.1f}% "
+              f"{cumtime:>9.3f} {100 * cumtime / total:>5.1f}%", file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fonctions les plus couteuses sur des coups profiles (AWALE_PROFILE)")
+    parser.add_argument("paths", nargs="*", default=[DEFAULT_DIR], help="fichiers .prof ou dossiers")
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--sort", choices=("tottime", "cumtime"), default="tottime",
+                        help="temps propre (defaut) ou cumule avec les fonctions appelees")
+    args = parser.parse_args(argv)
+    files = profile_files(args.paths)
+    if not files:
+        parser.error("aucun fichier .prof")
+    report(files, args.top, args.sort)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
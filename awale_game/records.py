@@ -0,0 +1,135 @@
+"""
+Enregistrement binaire des parties : une position = un enregistrement de taille fixe.
+
+Fichier : en-tete (magic, version, taille d'un enregistrement) puis les
+enregistrements bout a bout, sans separateur. Un enregistrement (56 octets) :
+  48 octets   graines par case (board[3 * trou + couleur])
+  2 octets    scores des deux joueurs
+  1 octet     joueur au trait
+  1 octet     coup joue depuis cette position (game.encode_move, NO_MOVE en fin de partie)
+  1 octet     resultat de la partie (0 ou 1 = gagnant, DRAW)
+  1 octet     inutilise
+  2 octets    numero du demi-coup
+
+Ecriture : GameRecorder garde les positions de la partie en cours et les
+ajoute au fichier a la fin (le resultat n'est connu qu'a ce moment).
+Lecture : RecordReader ouvre le fichier en mmap ; positions() le parcourt par
+blocs sans analyse de texte, array() en donne une vue NumPy sans copie (si installe).
+"""
+import mmap
+import os
+import struct
+from collections import namedtuple
+
+from game import AwaleGame
+
+MAGIC = b"AWGR"
+VERSION = 1
+HEADER = struct.Struct("<4sHH")  # magic, version, taille d'un enregistrement
+RECORD = struct.Struct("<48s2BBBBxH")
+
+NO_MOVE = 255
+DRAW = 2
+
+CHUNK_RECORDS = 4096
+
+Position = namedtuple("Position", "board scores side move result ply")
+
+# meme disposition, pour une lecture NumPy sans copie
+NUMPY_FIELDS = [("board", "u1", (48,)), ("scores", "u1", (2,)), ("side", "u1"), ("move", "u1"),
+                ("result", "u1"), ("pad", "u1"), ("ply", "<u2")]
+
+
+def game_result(game):
+    s1, s2 = game.scores
+    return 0 if s1 > s2 else 1 if s2 > s1 else DRAW
+
+
+class GameRecorder:
+    """Ecriture en ajout : record() avant chaque coup, end_game() a la fin de la partie."""
+
+    def __init__(self, path):
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, "ab")
+        if new_file:
+            self.file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+        else:
+            with open(path, "rb") as f:
+                _check_header(f.read(HEADER.size), path)
+        self.pending = []
+        self.games = 0
+        self.positions = 0
+
+    def record(self, game, move):
+        """Position courante et coup qui va y etre joue."""
+        self.pending.append((bytes(game.board), game.scores[0], game.scores[1], game.current_player,
+                             NO_MOVE if move is None else move, game.moves_played))
+
+    def end_game(self, game):
+        """Derniere position + resultat, et ecriture de toute la partie d'un coup."""
+        self.record(game, None)
+        result = game_result(game)
+        self.file.write(b"".join(RECORD.pack(board, s1, s2, side, move, result, ply)
+                                 for board, s1, s2, side, move, ply in self.pending))
+        self.file.flush()
+        self.games += 1
+        self.positions += len(self.pending)
+        self.pending = []
+
+    def close(self):
+        self.file.close()
+
+
+def _check_header(data, path):
+    if len(data) < HEADER.size:
+        raise ValueError(f"{path} : fichier trop court")
+    magic, version, record_size = HEADER.unpack(data[:HEADER.size])
+    if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+        raise ValueError(f"{path} : pas un fichier de parties (version {VERSION})")
+
+
+class RecordReader:
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        _check_header(self.data[:HEADER.size], path)
+        self.count = (len(self.data) - HEADER.size) // RECORD.size
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        board, s1, s2, side, move, result, ply = RECORD.unpack_from(self.data, HEADER.size + i * RECORD.size)
+        return Position(board, (s1, s2), side, None if move == NO_MOVE else move, result, ply)
+
+    def positions(self):
+        """Toutes les positions, dans l'ordre du fichier (board reste des octets : board[i] est un int)."""
+        # par blocs : memoire bornee meme pour un fichier de plusieurs Go
+        for start in range(0, self.count, CHUNK_RECORDS):
+            begin = HEADER.size + start * RECORD.size
+            chunk = self.data[begin:begin + min(CHUNK_RECORDS, self.count - start) * RECORD.size]
+            for board, s1, s2, side, move, result, ply in RECORD.iter_unpack(chunk):
+                yield Position(board, (s1, s2), side, None if move == NO_MOVE else move, result, ply)
+
+    def array(self):
+        """Tableau NumPy structure (champs de NUMPY_FIELDS) qui lit directement le mmap."""
+        import numpy as np
+        return np.frombuffer(self.data, dtype=np.dtype(NUMPY_FIELDS), count=self.count, offset=HEADER.size)
+
+
+def to_game(position):
+    """AwaleGame dans l'etat d'une position enregistree."""
+    game = AwaleGame()
+    game.board = list(position.board)
+    game.scores = list(position.scores)
+    game.current_player = position.side
+    game.moves_played = position.ply
+    game.key = game.compute_key()
+    game.compute_features()
+    return game
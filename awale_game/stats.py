@@ -0,0 +1,30 @@
+import json
+import os
+import sys
+
+
+class StatsWriter:
+    """
+    Un enregistrement JSON par coup joue (une ligne), sur stderr ou dans un fichier.
+    Active avec AWALE_STATS=stderr ou AWALE_STATS=chemin/du/fichier.jsonl ;
+    sans la variable, from_env() renvoie None et rien n'est calcule ni ecrit.
+    """
+
+    def __init__(self, target):
+        if target == "stderr":
+            self.out = sys.stderr
+        else:
+            self.out = open(target, "a")
+
+    def write(self, record):
+        self.out.write(json.dumps(record) + "\n")
+        self.out.flush()
+
+    def close(self):
+        if self.out is not sys.stderr:
+            self.out.close()
+
+
+def from_env():
+    target = os.environ.get("AWALE_STATS")
+    return StatsWriter(target) if target else None
@@ -0,0 +1,248 @@
+"""
+Tables de finale calculees par analyse retrograde, lues par mmap pendant la recherche.
+
+Une position de la table = repartition des graines R/B/T sur les 48 cases + joueur
+au trait. La valeur stockee (int8) est la difference des graines capturees d'ici
+la fin (joueur au trait - adversaire) en jeu parfait. Les scores deja acquis n'ont
+pas besoin d'etre dans la table : le resultat de la partie est le signe de
+(difference actuelle + valeur), et prendre le signe ne change pas le minimax.
+La fin a 49 graines ne change pas ce signe non plus (l'autre joueur ne peut plus
+depasser 47). La limite des 400 coups est ignoree ; une suite de coups sans
+capture qui boucle vaut 0.
+
+Taille : une couche de n graines contient 2 * C(n + 47, 47) positions, soit deja
+8.6e10 octets pour la premiere couche non terminale (n = END_SEEDS = 10). Le
+generateur affiche ces tailles et refuse au-dela de MAX_POSITIONS sans --force ;
+--end-seeds permet de construire de petites tables (regle modifiee) pour tester.
+
+    python tablebase.py --max-seeds 11 --out endgame.tb
+    python tablebase.py --end-seeds 2 --max-seeds 3 --out test.tb --force
+"""
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from math import comb
+
+from game import AwaleGame, END_SEEDS, SIDE_SEEDS
+
+MAGIC = b"AWTB"
+VERSION = 1
+# magic, version, seuil de fin de partie, nombre max de graines sur le plateau
+HEADER = struct.Struct("<4sHHH")
+N_SLOTS = 48
+
+# au dela, le generateur demande --force (1 octet par position)
+MAX_POSITIONS = 50_000_000
+
+# BINOMIAL[n][k] pour le rang des repartitions (systeme de numeration combinatoire)
+BINOMIAL = [[comb(n, k) for k in range(97)] for n in range(96 + N_SLOTS)]
+
+
+def layer_size(n):
+    """Nombre de plateaux avec n graines (etoiles et barres)."""
+    return comb(n + N_SLOTS - 1, n)
+
+
+def rank(board):
+    """Rang du plateau parmi ceux qui ont le meme nombre de graines."""
+    # la j-eme graine (j >= 1) est a la position slot + j - 1 dans le codage etoiles/barres
+    r = 0
+    j = 0
+    for slot, count in enumerate(board):
+        for _ in range(count):
+            j += 1
+            r += BINOMIAL[slot + j - 1][j]
+    return r
+
+
+def unrank(r, n):
+    """Plateau de n graines de rang r (inverse de rank)."""
+    board = [0] * N_SLOTS
+    for j in range(n, 0, -1):
+        # plus grande position p avec C(p, j) <= r
+        p = j - 1
+        while BINOMIAL[p + 1][j] <= r:
+            p += 1
+        r -= BINOMIAL[p][j]
+        board[p - j + 1] += 1
+    return board
+
+
+class Tablebase:
+    """Table ouverte en mmap : seules les pages touchees par les probes sont lues."""
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.end_seeds, self.max_seeds = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} : pas une table de finale (version {VERSION})")
+        self.offsets = {}
+        offset = HEADER.size
+        for n in range(self.end_seeds, self.max_seeds + 1):
+            self.offsets[n] = offset
+            offset += 2 * layer_size(n)
+        if len(self.data) != offset:
+            raise ValueError(f"{path} : taille {len(self.data)} au lieu de {offset}")
+        self.probes = 0
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+    def probe(self, game):
+        """Graines capturees d'ici la fin, joueur au trait - adversaire ; None hors de la table."""
+        n = game.features[SIDE_SEEDS] + game.features[SIDE_SEEDS + 1]
+        if n > self.max_seeds or n < self.end_seeds:
+            return None
+        self.probes += 1
+        value = self.data[self.offsets[n] + 2 * rank(game.board) + game.current_player]
+        return value - 256 if value > 127 else value
+
+
+def load(path):
+    """Table pour le bot (regle de fin normale) ; None si le fichier n'existe pas."""
+    if not os.path.exists(path):
+        return None
+    table = Tablebase(path)
+    if table.end_seeds != END_SEEDS:
+        table.close()
+        raise ValueError(f"{path} : table construite pour une fin a {table.end_seeds} graines, pas {END_SEEDS}")
+    return table
+
+
+def _position(board, side):
+    game = AwaleGame()
+    game.board = board
+    game.current_player = side
+    game.key = game.compute_key()
+    game.compute_features()
+    return game
+
+
+def solve_layer(n, end_seeds, layers):
+    """
+    Valeurs de la couche n (index 2 * rang + joueur au trait), les couches plus
+    petites etant deja dans layers. Une capture fait toujours descendre de couche :
+    dans la couche, les coups sans capture forment un graphe (avec cycles) et les
+    captures sont des sorties de valeur connue. Pour chaque seuil t on calcule par
+    retrograde les positions ou le joueur 0 peut garantir >= t (attracteur) ; la
+    valeur est le plus grand seuil garanti. Valeurs vues du joueur 0 pendant le calcul.
+    """
+    size = 2 * layer_size(n)
+    successors = [None] * size  # coups sans capture : index dans la couche
+    exits = [None] * size       # resultats (vus du joueur 0) des coups qui sortent de la couche
+    predecessors = [[] for _ in range(size)]
+    for r in range(size // 2):
+        board = unrank(r, n)
+        for side in (0, 1):
+            i = 2 * r + side
+            game = _position(list(board), side)
+            sign = 1 if side == 0 else -1
+            inside, outside = [], []
+            for move in game.get_valid_moves():
+                game.make_move(move)
+                captured = game.scores[side]
+                if captured == 0:
+                    j = 2 * rank(game.board) + 1 - side
+                    inside.append(j)
+                    predecessors[j].append(i)
+                else:
+                    rest = n - captured
+                    # valeur stockee pour le joueur au trait (l'adversaire), remise du point de vue du joueur 0
+                    after = 0 if rest < end_seeds else layers[rest][2 * rank(game.board) + 1 - side] * -sign
+                    outside.append(sign * captured + after)
+                game.unmake_move()
+            if not inside and not outside:
+                outside.append(0)  # bloque : la partie s'arrete
+            successors[i] = inside
+            exits[i] = outside
+
+    thresholds = sorted({value for outside in exits for value in outside} | {0})
+    values = [thresholds[0]] * size
+    for t in thresholds[1:]:
+        if t > 0:
+            # le joueur 0 doit atteindre une sortie >= t (une partie infinie vaut 0 < t)
+            won = _attractor(0, lambda value: value >= t, successors, exits, predecessors)
+            reached = won
+        else:
+            # une partie infinie suffit au joueur 0 : il gagne sauf si 1 force une sortie < t
+            lost = _attractor(1, lambda value: value < t, successors, exits, predecessors)
+            reached = [not x for x in lost]
+        for i in range(size):
+            if reached[i]:
+                values[i] = t
+
+    # stockage du point de vue du joueur au trait
+    return array("b", (value if i % 2 == 0 else -value for i, value in enumerate(values)))
+
+
+def _attractor(attacker, good, successors, exits, predecessors):
+    """Positions d'ou attacker force une sortie 'good' (retrograde avec compteurs)."""
+    size = len(successors)
+    won = [False] * size
+    remaining = [len(s) for s in successors]
+    queue = []
+    for i in range(size):
+        if i % 2 == attacker:
+            if any(good(value) for value in exits[i]):
+                won[i] = True
+                queue.append(i)
+        elif all(good(value) for value in exits[i]):
+            if remaining[i] == 0:
+                won[i] = True
+                queue.append(i)
+        else:
+            remaining[i] = -1  # une sortie perdante : le defenseur l'evitera toujours
+    while queue:
+        j = queue.pop()
+        for i in predecessors[j]:
+            if won[i]:
+                continue
+            if i % 2 == attacker:
+                won[i] = True
+                queue.append(i)
+            elif remaining[i] > 0:
+                remaining[i] -= 1
+                if remaining[i] == 0:
+                    won[i] = True
+                    queue.append(i)
+    return won
+
+
+def generate(path, max_seeds, end_seeds=END_SEEDS, force=False):
+    total = sum(2 * layer_size(n) for n in range(end_seeds, max_seeds + 1))
+    for n in range(end_seeds, max_seeds + 1):
+        print(f"couche {n:2d} graines : {2 * layer_size(n):.3e} positions")
+    print(f"total {total:.3e} positions ({total / 2 ** 20:.1f} Mo)")
+    if total > MAX_POSITIONS and not force:
+        print(f"trop grand (limite {MAX_POSITIONS:.0e} positions, --force pour passer outre)")
+        return False
+    layers = {}
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, end_seeds, max_seeds))
+        for n in range(end_seeds, max_seeds + 1):
+            start = time.perf_counter()
+            layers[n] = solve_layer(n, end_seeds, layers)
+            layers[n].tofile(f)
+            print(f"couche {n} resolue en {time.perf_counter() - start:.1f}s", flush=True)
+    return True
+
+
+def main(argv=None):
+    import argparse  # seulement pour la ligne de commande : le bot importe ce module au lancement
+    parser = argparse.ArgumentParser(description="Generation des tables de finale")
+    parser.add_argument("--max-seeds", type=int, required=True, help="graines max sur le plateau")
+    parser.add_argument("--end-seeds", type=int, default=END_SEEDS,
+                        help="seuil de fin de partie (autre que 10 : tables de test seulement)")
+    parser.add_argument("--out", default="endgame.tb")
+    parser.add_argument("--force", action="store_true")
+    args = parser.parse_args(argv)
+    return 0 if generate(args.out, args.max_seeds, args.end_seeds, args.force) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
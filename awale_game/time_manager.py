@@ -0,0 +1,56 @@
+# limite du protocole (Arbitre.java) : 2 secondes par coup
+MOVE_TIME = 2.0
+
+# facteur de branchement effectif utilise tant qu'on n'a pas assez d'iterations pour le mesurer
+DEFAULT_EBF = 4.0
+# au dela, c'est du bruit (iterations precedentes servies par la table de transposition)
+MAX_EBF = 10.0
+
+# si le meilleur coup vient de changer, on lance l'iteration suivante meme si seule
+# cette fraction du temps prevu tient avant la deadline (un resultat partiel sert quand meme)
+UNSTABLE_FRACTION = 0.5
+
+# marge de securite par defaut (budget 1.9 s), et plancher : le retard entre la fin de la
+# recherche et la reception du coup par l'arbitre (pipe, ordonnancement) ne se mesure
+# pas depuis le processus du joueur ; harness.py le mesure de l'exterieur et donne la
+# marge a passer avec AWALE_MARGIN si elle doit etre plus grande
+SAFETY_MARGIN = 0.1
+
+
+class TimeManager:
+    """
+    Gestion du temps d'un coup pour l'iterative deepening.
+    - budget() : temps de recherche = temps du coup - marge de securite
+    - la marge est fixe : safety_margin, jamais moins que min_margin
+    - next_iteration_fits() : on ne lance pas une iteration qui ne pourra pas
+      finir, en predisant son cout avec le facteur de branchement effectif
+    """
+
+    def __init__(self, move_time=MOVE_TIME, safety_margin=SAFETY_MARGIN, min_margin=SAFETY_MARGIN):
+        self.move_time = move_time
+        self.margin = max(min_margin, safety_margin)
+        self.last_ebf = None
+
+    def budget(self):
+        return self.move_time - self.margin
+
+    def effective_branching(self, iterations):
+        """Rapport entre les durees des deux dernieres iterations terminees."""
+        if len(iterations) < 3:
+            return DEFAULT_EBF
+        t1 = iterations[-2][3] - iterations[-3][3]
+        t2 = iterations[-1][3] - iterations[-2][3]
+        if t1 <= 1e-4:
+            return DEFAULT_EBF
+        return min(MAX_EBF, max(1.0, t2 / t1))
+
+    def next_iteration_fits(self, iterations, remaining, best_changed):
+        """iterations : (profondeur, coup, score, temps ecoule, noeuds) ; remaining : temps avant la deadline."""
+        if not iterations:
+            return True
+        self.last_ebf = self.effective_branching(iterations)
+        last_duration = iterations[-1][3] - (iterations[-2][3] if len(iterations) > 1 else 0.0)
+        predicted = last_duration * self.last_ebf
+        if best_changed:
+            predicted *= UNSTABLE_FRACTION
+        return predicted <= remaining
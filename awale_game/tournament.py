@@ -0,0 +1,235 @@
+"""
+Tournoi entre deux configurations de MinimaxBot, sur tous les coeurs.
+
+    python tournament.py --games 2000 --nodes 20000 -a "tt=16" -b "tt=16,depth=6"
+    python tournament.py --time 0.2 --sprt 0 10
+    python tournament.py --time 2 -a "engine=mcts" -b "engine=minimax"
+
+Chaque ouverture aleatoire est jouee deux fois en inversant les couleurs.
+Resultat vu de A : victoires / nulles / defaites, difference d'Elo avec
+intervalle a 95%, et verdict SPRT (on s'arrete des qu'il est atteint).
+"""
+import argparse
+import math
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+from bot import MinimaxBot
+from game import AwaleGame
+from time_manager import TimeManager
+import profiling
+import weights
+
+# options d'une configuration : "cle=valeur,cle=valeur"
+CONFIG_KEYS = {"tt": int, "depth": int, "nodes": int, "time": float, "batch": int, "lmr": int, "aspiration": int,
+               "weights": str, "engine": str, "rollout": int, "evalcache": int}
+ENGINES = ("minimax", "mcts")
+
+
+def parse_config(text):
+    config = {}
+    for part in filter(None, text.split(",")):
+        key, _, value = part.partition("=")
+        if key not in CONFIG_KEYS:
+            raise argparse.ArgumentTypeError(f"option inconnue '{key}' (connues : {', '.join(CONFIG_KEYS)})")
+        config[key] = CONFIG_KEYS[key](value)
+    if config.get("engine", "minimax") not in ENGINES:
+        raise argparse.ArgumentTypeError(f"moteur inconnu '{config['engine']}' (connus : {', '.join(ENGINES)})")
+    if "weights" in config and not os.path.exists(config["weights"]):
+        raise argparse.ArgumentTypeError(f"fichier de poids introuvable : {config['weights']}")
+    return config
+
+
+def make_bot(player_id, config, seed):
+    eval_weights = weights.load(config["weights"]) if "weights" in config else None
+    if config.get("engine") == "mcts":
+        from mcts import MctsBot, ROLLOUT_DEPTH
+        # rollout=0 : playouts jusqu'a la fin de la partie ; nodes = nombre de playouts
+        rollout = config.get("rollout", ROLLOUT_DEPTH)
+        bot = MctsBot(player_id, seed=seed, rollout_depth=rollout or None, weights=eval_weights)
+    else:
+        bot = MinimaxBot(player_id, tt_size_mb=config.get("tt", 16), randomize=True, seed=seed,
+                         batch_eval=bool(config.get("batch", 0)), weights=eval_weights,
+                         eval_cache_mb=config.get("evalcache", 0))
+        if "depth" in config:
+            bot.max_depth = config["depth"]
+        bot.lmr = bool(config.get("lmr", 1))
+        bot.aspiration = bool(config.get("aspiration", 1))
+    if "nodes" in config:
+        bot.max_nodes = config["nodes"]
+    if "time" in config:
+        bot.time_manager = TimeManager(move_time=config["time"], safety_margin=0.0, min_margin=0.0)
+    return bot
+
+
+def random_opening(rng, plies):
+    game = AwaleGame()
+    opening = []
+    for _ in range(plies):
+        moves = game.get_valid_moves()
+        if not moves or game.is_game_over()[0]:
+            break
+        move = rng.choice(moves)
+        game.make_move(move)
+        opening.append(move)
+    return opening
+
+
+def play_game(task):
+    """Une partie ; renvoie (index, resultat pour A : 1, 0.5 ou 0, coups joues depuis le depart)."""
+    index, opening, a_first, config_a, config_b, seed = task
+    a_id = 0 if a_first else 1
+    bots = {a_id: make_bot(a_id, config_a, seed), 1 - a_id: make_bot(1 - a_id, config_b, seed + 1)}
+    # AWALE_PROFILE (voir profiling.py) : fichiers marques du numero de partie
+    profiler = profiling.from_env(f"partie{index}")
+    game = AwaleGame()
+    for move in opening:
+        game.make_move(move)
+    moves = list(opening)
+    while not game.is_game_over()[0]:
+        bot = bots[game.current_player]
+        if profiler is None:
+            move = bot.get_best_move(game)
+        else:
+            move = profiler.search(bot.get_best_move, game)
+        if move is None:
+            break  # joueur bloque : on departage aux graines capturees
+        game.make_move(move)
+        moves.append(move)
+    mine, theirs = game.scores[a_id], game.scores[1 - a_id]
+    result = 1.0 if mine > theirs else 0.0 if mine < theirs else 0.5
+    return index, result, moves
+
+
+def record_game(recorder, moves):
+    # les processus renvoient les coups ; seul le processus principal ecrit dans le fichier
+    game = AwaleGame()
+    for move in moves:
+        recorder.record(game, move)
+        game.make_move(move)
+    recorder.end_game(game)
+
+
+def expected_score(elo):
+    return 1.0 / (1.0 + 10.0 ** (-elo / 400.0))
+
+
+def elo_from_score(score):
+    score = min(max(score, 1e-6), 1.0 - 1e-6)
+    return -400.0 * math.log10(1.0 / score - 1.0)
+
+
+def elo_estimate(wins, draws, losses):
+    """Difference d'Elo et demi-largeur de l'intervalle a 95%."""
+    n = wins + draws + losses
+    score = (wins + 0.5 * draws) / n
+    variance = (wins * (1.0 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / n
+    margin = 1.96 * math.sqrt(variance / n)
+    elo = elo_from_score(score)
+    return elo, (elo_from_score(score + margin) - elo_from_score(score - margin)) / 2
+
+
+def sprt_llr(wins, draws, losses, elo0, elo1):
+    """Log-vraisemblance H1/H0, approximation normale du modele trinomial (comme fishtest)."""
+    n = wins + draws + losses
+    score = (wins + 0.5 * draws) / n
+    variance = (wins * (1.0 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / n
+    if variance <= 0:
+        return 0.0
+    s0, s1 = expected_score(elo0), expected_score(elo1)
+    return n * (s1 - s0) * (2 * score - s0 - s1) / (2 * variance)
+
+
+def sprt_bounds(alpha, beta):
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    config_a, config_b = dict(args.a), dict(args.b)
+    for config in (config_a, config_b):
+        # budget commun, sauf si la configuration precise le sien
+        if args.nodes is not None:
+            config.setdefault("nodes", args.nodes)
+        elif "nodes" not in config:
+            config.setdefault("time", args.time)
+
+    tasks = []
+    for pair in range(args.games // 2):
+        opening = random_opening(rng, args.opening_plies)
+        for a_first in (True, False):
+            tasks.append((len(tasks), opening, a_first, config_a, config_b, rng.randrange(1 << 30)))
+
+    recorder = None
+    if args.record:
+        from records import GameRecorder
+        recorder = GameRecorder(args.record)
+
+    lower, upper = sprt_bounds(args.alpha, args.beta)
+    wins = draws = losses = 0
+    verdict = None
+    start = time.perf_counter()
+    print(f"A = {config_a}\nB = {config_b}\n{len(tasks)} parties, {args.workers} processus")
+    with multiprocessing.Pool(args.workers) as pool:
+        for done, (_, result, moves) in enumerate(pool.imap_unordered(play_game, tasks), 1):
+            if recorder is not None:
+                record_game(recorder, moves)
+            if result == 1.0:
+                wins += 1
+            elif result == 0.0:
+                losses += 1
+            else:
+                draws += 1
+            llr = sprt_llr(wins, draws, losses, args.sprt[0], args.sprt[1]) if args.sprt else 0.0
+            if done % args.report_every == 0 or done == len(tasks):
+                elo, error = elo_estimate(wins, draws, losses)
+                line = f"{done:5d}  +{wins} ={draws} -{losses}  elo {elo:+.1f} +/- {error:.1f}"
+                if args.sprt:
+                    line += f"  llr {llr:+.2f} [{lower:.2f}, {upper:.2f}]"
+                print(line, flush=True)
+            if args.sprt and (llr <= lower or llr >= upper):
+                verdict = "H1 acceptee (A plus fort)" if llr >= upper else "H0 acceptee (pas de gain)"
+                pool.terminate()
+                break
+
+    if recorder is not None:
+        recorder.close()
+        print(f"{recorder.positions} positions de {recorder.games} parties ajoutees a {args.record}")
+
+    n = wins + draws + losses
+    elo, error = elo_estimate(wins, draws, losses)
+    print(f"\n{n} parties en {time.perf_counter() - start:.0f}s : A +{wins} ={draws} -{losses} "
+          f"({(wins + 0.5 * draws) / n:.1%})")
+    print(f"Elo(A - B) = {elo:+.1f} +/- {error:.1f} (95%)")
+    if args.sprt:
+        print(f"SPRT [{args.sprt[0]}, {args.sprt[1]}] : {verdict or 'pas de verdict'}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tournoi entre deux configurations du bot")
+    parser.add_argument("-a", type=parse_config, default={}, help="configuration A, ex. 'tt=32,depth=8'")
+    parser.add_argument("-b", type=parse_config, default={}, help="configuration B")
+    parser.add_argument("--games", type=int, default=1000, help="nombre de parties (par paires, couleurs inversees)")
+    parser.add_argument("--time", type=float, default=0.1, help="secondes par coup")
+    parser.add_argument("--nodes", type=int, default=None, help="noeuds par coup (remplace --time)")
+    parser.add_argument("--opening-plies", type=int, default=4, help="coups aleatoires d'ouverture")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--sprt", type=float, nargs=2, metavar=("ELO0", "ELO1"), default=None,
+                        help="test sequentiel H0: elo <= ELO0 contre H1: elo >= ELO1")
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--beta", type=float, default=0.05)
+    parser.add_argument("--report-every", type=int, default=20)
+    parser.add_argument("--record", default=None, help="ajouter les positions jouees a ce fichier (records.py)")
+    args = parser.parse_args(argv)
+    # les parties vont par paires (couleurs inversees) : il en faut au moins deux
+    if args.games < 2:
+        parser.error("--games doit valoir au moins 2")
+    run(args)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
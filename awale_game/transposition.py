@@ -0,0 +1,83 @@
+# types de borne stockes avec le score
+EXACT = 0
+LOWER = 1  # score >= valeur stockee (coupure beta)
+UPPER = 2  # score <= valeur stockee (aucun coup n'a depasse alpha)
+
+# taille approximative d'une entree en memoire (tuple + cle 64 bits + slot de liste)
+ENTRY_BYTES = 160
+
+
+class TranspositionTable:
+    """
+    Table de transposition de taille bornee, indexee par la cle Zobrist.
+    Chaque case contient deux entrees : une "depth-preferred" (on garde la
+    plus profonde de la recherche courante) et une "always-replace".
+    Une entree = (key, depth, flag, score, move, age).
+    """
+
+    def __init__(self, size_mb=16):
+        # nombre de cases = plus grande puissance de 2 qui tient dans le budget
+        max_buckets = max(1, (size_mb * 1024 * 1024) // (2 * ENTRY_BYTES))
+        n_buckets = 1
+        while n_buckets * 2 <= max_buckets:
+            n_buckets *= 2
+        self.mask = n_buckets - 1
+        self.deep = [None] * n_buckets
+        self.recent = [None] * n_buckets
+        self.age = 0
+        self.used = 0
+        self.probes = 0
+        self.hits = 0
+
+    def new_search(self):
+        # les entrees des coups precedents restent utilisables mais deviennent remplacables
+        self.age += 1
+        self.probes = 0
+        self.hits = 0
+
+    def probe(self, key):
+        self.probes += 1
+        i = key & self.mask
+        entry = self.deep[i]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        entry = self.recent[i]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        return None
+
+    def store(self, key, depth, flag, score, move):
+        i = key & self.mask
+        entry = (key, depth, flag, score, move, self.age)
+        old = self.deep[i]
+        if old is None:
+            self.used += 1
+            self.deep[i] = entry
+        elif old[0] == key or depth >= old[1] or old[5] != self.age:
+            # l'ancienne entree profonde descend dans la case always-replace
+            if old[0] != key:
+                if self.recent[i] is None:
+                    self.used += 1
+                self.recent[i] = old
+            self.deep[i] = entry
+        else:
+            if self.recent[i] is None:
+                self.used += 1
+            self.recent[i] = entry
+
+    def clear(self):
+        n_buckets = self.mask + 1
+        self.deep = [None] * n_buckets
+        self.recent = [None] * n_buckets
+        self.used = 0
+
+    def hit_rate(self):
+        return self.hits / self.probes if self.probes else 0.0
+
+    def fill(self):
+        return self.used / (2 * (self.mask + 1))
+
+    def report(self):
+        return f"tt hits {self.hits}/{self.probes} ({self.hit_rate():.1%}), fill {self.fill():.1%}"
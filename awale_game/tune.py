@@ -0,0 +1,179 @@
+"""
+Reglage des poids de MinimaxBot.evaluate sur des parties enregistrees (records.py),
+par regression logistique facon Texel.
+
+Pour chaque position on calcule en lot avec NumPy les termes de evaluate (les
+memes que game.features, recalcules depuis le plateau), des deux points de vue.
+Le modele predit le resultat de la partie pour ce joueur (1, 0.5 ou 0) par
+sigmoid(K * evaluation) ; K est choisi d'abord pour les poids actuels, puis les
+poids sont ajustes par descente de gradient (Adam) sur l'erreur quadratique.
+Les fichiers sont lus en mmap par tranches de --batch positions, dans un ordre
+different a chaque passe : la memoire reste bornee quelle que soit leur taille.
+
+Le poids du score est fixe par defaut (une graine = 10 points : la fenetre
+d'aspiration de bot.py et les bornes des tables en dependent), --free-score le libere.
+Le resultat est ecrit au format de weights.py, arrondi a l'echelle SCALE.
+
+    python tournament.py --games 2000 --nodes 5000 --record games.rec
+    python tune.py games.rec --epochs 10 --out weights.txt
+    python tournament.py --games 400 --nodes 5000 -a "weights=weights.txt"
+
+NumPy est necessaire ici (pas pour le bot).
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+import weights
+from records import RecordReader, DRAW
+
+NAMES = weights.NAMES
+# valeurs de K essayees (une seule passe sur les donnees pour toutes)
+K_GRID = np.geomspace(1e-4, 1e-1, 61)
+
+
+def features(chunk, me):
+    """Termes de evaluate pour le joueur me (une colonne par nom de NAMES, ordre de NAMES)."""
+    opp = 1 - me
+    holes = chunk["board"].reshape(-1, 16, 3).astype(np.int64)
+    totals = holes.sum(axis=2)
+    present = (holes > 0).astype(np.int64)  # bool + bool serait un ou logique
+    mobility = present[:, :, 0] + present[:, :, 1] + 2 * present[:, :, 2]
+    weak = (totals > 0) & (totals < 3)
+    scores = chunk["scores"].astype(np.int64)
+    # trous du joueur p : indices de meme parite que p
+    my_mobility = mobility[:, me::2].sum(axis=1)
+    columns = {
+        "score": scores[:, me] - scores[:, opp],
+        "capture": weak[:, opp::2].sum(axis=1),
+        "mobility": my_mobility,
+        "low_mobility": my_mobility <= 2,
+        "seeds": totals[:, me::2].sum(axis=1) - totals[:, opp::2].sum(axis=1),
+    }
+    return np.stack([columns[name] for name in NAMES], axis=1).astype(np.float64)
+
+
+def targets(chunk, me):
+    result = chunk["result"]
+    return np.where(result == DRAW, 0.5, (result == me).astype(np.float64))
+
+
+def batches(readers, batch_size, rng=None):
+    """(X, y) par tranche de batch_size positions, les deux points de vue empiles."""
+    # tranches dans un ordre aleatoire si rng (positions voisines = meme partie, tres correlees)
+    slices = [(reader, start) for reader in readers for start in range(0, len(reader), batch_size)]
+    if rng is not None:
+        rng.shuffle(slices)
+    for reader, start in slices:
+        chunk = reader.array()[start:start + batch_size]
+        # evaluate ne fait pas de calcul au dela de 48 (victoire acquise)
+        chunk = chunk[(chunk["scores"] <= 48).all(axis=1)]
+        if len(chunk) == 0:
+            continue
+        yield (np.concatenate([features(chunk, 0), features(chunk, 1)]),
+               np.concatenate([targets(chunk, 0), targets(chunk, 1)]))
+
+
+def sigmoid(z):
+    return 1.0 / (1.0 + np.exp(-z))
+
+
+def evaluation(X, w):
+    """Evaluation (unites de bot.py) de chaque ligne, sans l'arrondi de evaluate."""
+    return X @ w / weights.SCALE
+
+
+def fit_k(readers, w, batch_size):
+    """K qui minimise l'erreur des poids w (grille K_GRID)."""
+    errors = np.zeros(len(K_GRID))
+    n = 0
+    for X, y in batches(readers, batch_size):
+        e = evaluation(X, w)
+        errors += ((sigmoid(np.outer(e, K_GRID)) - y[:, None]) ** 2).sum(axis=0)
+        n += len(y)
+    best = int(np.argmin(errors))
+    return K_GRID[best], errors[best] / max(n, 1), n
+
+
+def loss(readers, w, k, batch_size):
+    total = 0.0
+    n = 0
+    for X, y in batches(readers, batch_size):
+        total += ((sigmoid(k * evaluation(X, w)) - y) ** 2).sum()
+        n += len(y)
+    return total / n
+
+
+def tune(readers, k, w, epochs, batch_size, lr, free_score=False, seed=0, log=print):
+    """Adam sur l'erreur quadratique ; poids en flottants a l'echelle SCALE."""
+    rng = np.random.default_rng(seed)
+    w = np.array(w, dtype=np.float64)
+    trainable = np.ones(len(w))
+    if not free_score:
+        trainable[NAMES.index("score")] = 0.0
+    m = np.zeros(len(w))
+    v = np.zeros(len(w))
+    beta1, beta2, eps = 0.9, 0.999, 1e-8
+    step = 0
+    for epoch in range(epochs):
+        start = time.perf_counter()
+        total = 0.0
+        n = 0
+        for X, y in batches(readers, batch_size, rng):
+            p = sigmoid(k * evaluation(X, w))
+            total += ((p - y) ** 2).sum()
+            n += len(y)
+            # d(erreur)/dw, moyenne sur la tranche
+            grad = (2 * (p - y) * p * (1 - p)) @ X * (k / weights.SCALE) / len(y)
+            step += 1
+            m = beta1 * m + (1 - beta1) * grad
+            v = beta2 * v + (1 - beta2) * grad ** 2
+            m_hat = m / (1 - beta1 ** step)
+            v_hat = v / (1 - beta2 ** step)
+            w -= trainable * lr * m_hat / (np.sqrt(v_hat) + eps)
+        log(f"passe {epoch + 1}/{epochs} : erreur {total / max(n, 1):.5f}, "
+            f"{' '.join(f'{name}={value:.1f}' for name, value in zip(NAMES, w))} "
+            f"({n / (time.perf_counter() - start):.0f} positions/s)")
+    return w
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reglage des poids de l'evaluation sur des parties enregistrees")
+    parser.add_argument("records", nargs="+", help="fichiers de parties (records.py)")
+    parser.add_argument("--out", default="weights.txt")
+    parser.add_argument("--init", help="poids de depart (defaut : ceux de weights.py)")
+    parser.add_argument("--epochs", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=65536, help="positions par tranche")
+    parser.add_argument("--lr", type=float, default=1.0, help="pas d'Adam (en unites de poids)")
+    parser.add_argument("--free-score", action="store_true", help="ajuster aussi le poids du score")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    readers = [RecordReader(path) for path in args.records]
+    start_weights = weights.DEFAULT_WEIGHTS
+    if args.init:
+        start_weights = weights.load(args.init)
+        if start_weights is None:
+            parser.error(f"fichier de poids introuvable : {args.init}")
+    w0 = np.array([start_weights[name] for name in NAMES], dtype=np.float64)
+
+    k, start_loss, n = fit_k(readers, w0, args.batch)
+    print(f"{n} positions (2 points de vue) dans {len(readers)} fichier(s), K = {k:.5f}, erreur {start_loss:.5f}")
+    if n == 0:
+        return 1
+    w = tune(readers, k, w0, args.epochs, args.batch, args.lr, args.free_score, args.seed)
+
+    tuned = {name: int(round(value)) for name, value in zip(NAMES, w)}
+    final_loss = loss(readers, np.array([tuned[name] for name in NAMES], dtype=np.float64), k, args.batch)
+    print(f"erreur {start_loss:.5f} -> {final_loss:.5f} (poids arrondis)")
+    weights.save(args.out, tuned, f"tune.py : {n} positions, K = {k:.5f}, erreur {start_loss:.5f} -> {final_loss:.5f}")
+    print(f"poids ecrits dans {args.out}")
+    for reader in readers:
+        reader.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,46 @@
+"""
+Poids de MinimaxBot.evaluate.
+
+Entiers a l'echelle SCALE : evaluate calcule la somme ponderee puis divise par
+SCALE (division entiere), donc les scores restent entiers (la fenetre nulle de
+la PVS en a besoin). Les poids par defaut redonnent exactement l'evaluation
+d'origine : score * 10, 3 par trou adverse capturable, 2 par unite de mobilite,
+-10 si mobilite <= 2, et (graines - graines adverses) // 2.
+
+Fichier (genere par tune.py) : une ligne "nom valeur" par poids, # pour les commentaires.
+Aucun fichier n'est charge par defaut : player_adapter.py ne lit que AWALE_WEIGHTS,
+tournament.py l'option weights=. weights_tuned.txt attend d'etre valide au temps de match.
+"""
+import os
+
+SCALE = 16
+
+NAMES = ("score", "capture", "mobility", "low_mobility", "seeds")
+DEFAULT_WEIGHTS = {"score": 160, "capture": 48, "mobility": 32, "low_mobility": -160, "seeds": 8}
+
+
+
+def load(path):
+    """Poids du fichier (les absents gardent leur valeur par defaut) ; None si pas de fichier."""
+    if not os.path.exists(path):
+        return None
+    weights = dict(DEFAULT_WEIGHTS)
+    with open(path) as f:
+        for line in f:
+            line = line.split("#")[0].strip()
+            if not line:
+                continue
+            name, value = line.split()
+            if name not in DEFAULT_WEIGHTS:
+                raise ValueError(f"{path} : poids inconnu '{name}'")
+            weights[name] = int(value)
+    return weights
+
+
+def save(path, weights, comment=None):
+    with open(path, "w") as f:
+        f.write(f"# poids de l'evaluation, echelle {SCALE} (voir weights.py)\n")
+        if comment:
+            f.write(f"# {comment}\n")
+        for name in NAMES:
+            f.write(f"{name} {weights[name]}\n")